@@ -8,11 +8,19 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.models.base import Base
-from app.models.record import BaseRecord, SimpleRecord, PaymentRecord, CustomRecord
+from app.models.record import (
+    BaseRecord,
+    SimpleRecord,
+    PaymentRecord,
+    CustomRecord,
+    RecordTombstone,
+)
 from app.models.support import (
     Category,
     PaymentMethod,
     CalendarSync,
+    CalendarSyncItem,
+    SubscriptionToken,
     CustomFieldTemplate,
 )
 
@@ -0,0 +1,48 @@
+"""add next_occurrence columns
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "3f1c2a9d7b10"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("simple_records", "payment_records")
+
+
+def upgrade() -> None:
+    # 表由 Base.metadata.create_all 创建，新库可能已经带有该列和索引，
+    # 也可能还没有建表（应用启动时会按模型建出完整的表）
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    for table in TABLES:
+        if table not in tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if "next_occurrence" not in columns:
+            op.add_column(table, sa.Column("next_occurrence", sa.DateTime()))
+
+        index_name = f"ix_{table}_next_occurrence"
+        indexes = {i["name"] for i in inspector.get_indexes(table)}
+        if index_name not in indexes:
+            op.create_index(index_name, table, ["next_occurrence"])
+
+
+def downgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for table in TABLES:
+        if table not in tables:
+            continue
+        op.drop_index(f"ix_{table}_next_occurrence", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("next_occurrence")
@@ -0,0 +1,133 @@
+"""build records_bigrams in SQL instead of an app-registered function
+
+Revision ID: 7c3e5a1f9b24
+Revises: c1e8f4a2d957
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+revision: str = "7c3e5a1f9b24"
+down_revision: Union[str, None] = "c1e8f4a2d957"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 迁移内联本版本的 DDL，不依赖之后可能变化的 app.services.search_service
+MAX_POSITION = 10000
+
+
+def _bigrams(column: str) -> str:
+    return (
+        f"(SELECT group_concat(substr({column}, n, 2), ' ') "
+        f"FROM record_search_positions WHERE n < length({column}))"
+    )
+
+
+BIGRAM_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS records_bigrams USING fts5(
+        name, description, notes,
+        tokenize='unicode61 remove_diacritics 0', detail=none
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS record_search_positions (n INTEGER PRIMARY KEY)",
+    f"""
+    INSERT OR IGNORE INTO record_search_positions (n)
+    WITH RECURSIVE positions (n) AS (
+        SELECT 1 UNION ALL SELECT n + 1 FROM positions WHERE n < {MAX_POSITION}
+    )
+    SELECT n FROM positions
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_ai
+    AFTER INSERT ON record_search
+    BEGIN
+        INSERT INTO records_bigrams (rowid, name, description, notes)
+        VALUES (
+            new.id,
+            {_bigrams("new.name")},
+            {_bigrams("new.description")},
+            {_bigrams("new.notes")}
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_ad
+    AFTER DELETE ON record_search
+    BEGIN
+        DELETE FROM records_bigrams WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_au
+    AFTER UPDATE ON record_search
+    BEGIN
+        DELETE FROM records_bigrams WHERE rowid = old.id;
+        INSERT INTO records_bigrams (rowid, name, description, notes)
+        VALUES (
+            new.id,
+            {_bigrams("new.name")},
+            {_bigrams("new.description")},
+            {_bigrams("new.notes")}
+        );
+    END
+    """,
+]
+
+BIGRAM_BACKFILL = f"""
+    INSERT INTO records_bigrams (rowid, name, description, notes)
+    SELECT
+        id,
+        {_bigrams("record_search.name")},
+        {_bigrams("record_search.description")},
+        {_bigrams("record_search.notes")}
+    FROM record_search
+"""
+
+BIGRAM_DROP = [
+    "DROP TRIGGER IF EXISTS record_search_bigrams_au",
+    "DROP TRIGGER IF EXISTS record_search_bigrams_ad",
+    "DROP TRIGGER IF EXISTS record_search_bigrams_ai",
+    "DROP TABLE IF EXISTS records_bigrams",
+    "DROP TABLE IF EXISTS record_search_positions",
+]
+
+
+def upgrade() -> None:
+    # 上一版 9a2d6c4b8e31 的触发器调用应用在每个连接上注册的 search_bigrams，
+    # 其他连接（sqlite3 命令行、脚本、之后的迁移）写入记录都会失败；
+    # 按 record_search_positions 是否存在判断，删除后按纯 SQL 的触发器重建并补录
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    tables = set(
+        bind.execute(
+            text(
+                "SELECT name FROM sqlite_master WHERE name IN "
+                "('record_search', 'records_bigrams', 'record_search_positions')"
+            )
+        ).scalars()
+    )
+    if "record_search" not in tables or "record_search_positions" in tables:
+        return
+
+    for statement in BIGRAM_DROP:
+        bind.execute(text(statement))
+    try:
+        bind.execute(text(BIGRAM_DDL[0]))
+    except OperationalError:
+        return
+    for statement in BIGRAM_DDL[1:]:
+        bind.execute(text(statement))
+    bind.execute(text(BIGRAM_BACKFILL))
+
+
+def downgrade() -> None:
+    # 上一版结构依赖应用注册的函数，降级保留当前的两字索引
+    pass
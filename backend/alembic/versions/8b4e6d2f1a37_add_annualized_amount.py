@@ -0,0 +1,66 @@
+"""add annualized_amount to payment_records
+
+Revision ID: 8b4e6d2f1a37
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "8b4e6d2f1a37"
+down_revision: Union[str, None] = "3f1c2a9d7b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX_NAME = "ix_payment_records_annualized_amount"
+
+# period 列按枚举名存储
+PERIODS_PER_YEAR = {
+    "WEEK": 52,
+    "MONTH": 12,
+    "QUARTER": 4,
+    "HALF_YEAR": 2,
+    "YEAR": 1,
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # 还没有建表的新库由应用启动时按模型建表
+    if "payment_records" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("payment_records")}
+    if "annualized_amount" not in columns:
+        op.add_column(
+            "payment_records", sa.Column("annualized_amount", sa.Float())
+        )
+
+    indexes = {i["name"] for i in inspector.get_indexes("payment_records")}
+    if INDEX_NAME not in indexes:
+        op.create_index(INDEX_NAME, "payment_records", ["annualized_amount"])
+
+    payment_records = sa.table(
+        "payment_records",
+        sa.column("amount", sa.Float),
+        sa.column("period", sa.String),
+        sa.column("annualized_amount", sa.Float),
+    )
+    op.execute(
+        payment_records.update().values(
+            annualized_amount=payment_records.c.amount
+            * sa.case(PERIODS_PER_YEAR, value=payment_records.c.period)
+        )
+    )
+
+
+def downgrade() -> None:
+    if "payment_records" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.drop_index(INDEX_NAME, table_name="payment_records")
+    with op.batch_alter_table("payment_records") as batch_op:
+        batch_op.drop_column("annualized_amount")
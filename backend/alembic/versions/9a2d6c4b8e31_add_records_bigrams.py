@@ -0,0 +1,139 @@
+"""add two-character search index records_bigrams
+
+Revision ID: 9a2d6c4b8e31
+Revises: d3f7a1c8e254
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+revision: str = "9a2d6c4b8e31"
+down_revision: Union[str, None] = "d3f7a1c8e254"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 迁移内联本版本的 DDL，不依赖之后可能变化的 app.services.search_service。
+# 两字词在 SQL 中由 record_search_positions 切出，触发器不依赖应用注册的函数
+MAX_POSITION = 10000
+
+
+def _bigrams(column: str) -> str:
+    return (
+        f"(SELECT group_concat(substr({column}, n, 2), ' ') "
+        f"FROM record_search_positions WHERE n < length({column}))"
+    )
+
+
+BIGRAM_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS records_bigrams USING fts5(
+        name, description, notes,
+        tokenize='unicode61 remove_diacritics 0', detail=none
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS record_search_positions (n INTEGER PRIMARY KEY)",
+    f"""
+    INSERT OR IGNORE INTO record_search_positions (n)
+    WITH RECURSIVE positions (n) AS (
+        SELECT 1 UNION ALL SELECT n + 1 FROM positions WHERE n < {MAX_POSITION}
+    )
+    SELECT n FROM positions
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_ai
+    AFTER INSERT ON record_search
+    BEGIN
+        INSERT INTO records_bigrams (rowid, name, description, notes)
+        VALUES (
+            new.id,
+            {_bigrams("new.name")},
+            {_bigrams("new.description")},
+            {_bigrams("new.notes")}
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_ad
+    AFTER DELETE ON record_search
+    BEGIN
+        DELETE FROM records_bigrams WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_au
+    AFTER UPDATE ON record_search
+    BEGIN
+        DELETE FROM records_bigrams WHERE rowid = old.id;
+        INSERT INTO records_bigrams (rowid, name, description, notes)
+        VALUES (
+            new.id,
+            {_bigrams("new.name")},
+            {_bigrams("new.description")},
+            {_bigrams("new.notes")}
+        );
+    END
+    """,
+]
+
+BIGRAM_BACKFILL = f"""
+    INSERT INTO records_bigrams (rowid, name, description, notes)
+    SELECT
+        id,
+        {_bigrams("record_search.name")},
+        {_bigrams("record_search.description")},
+        {_bigrams("record_search.notes")}
+    FROM record_search
+"""
+
+BIGRAM_DROP = [
+    "DROP TRIGGER IF EXISTS record_search_bigrams_au",
+    "DROP TRIGGER IF EXISTS record_search_bigrams_ad",
+    "DROP TRIGGER IF EXISTS record_search_bigrams_ai",
+    "DROP TABLE IF EXISTS records_bigrams",
+    "DROP TABLE IF EXISTS record_search_positions",
+]
+
+
+def upgrade() -> None:
+    # 仅在已建立 record_search（SQLite 且支持 FTS5）时创建
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    tables = set(
+        bind.execute(
+            text(
+                "SELECT name FROM sqlite_master WHERE name IN "
+                "('record_search', 'records_bigrams', 'record_search_positions')"
+            )
+        ).scalars()
+    )
+    if "record_search" not in tables:
+        return
+
+    if "records_bigrams" in tables and "record_search_positions" not in tables:
+        # 应用启动时按上一版结构（触发器调用应用注册的函数）建立的索引，删除后重建
+        for statement in BIGRAM_DROP:
+            bind.execute(text(statement))
+        tables.discard("records_bigrams")
+    try:
+        bind.execute(text(BIGRAM_DDL[0]))
+    except OperationalError:
+        return
+    for statement in BIGRAM_DDL[1:]:
+        bind.execute(text(statement))
+    if "records_bigrams" not in tables:
+        bind.execute(text(BIGRAM_BACKFILL))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for statement in BIGRAM_DROP:
+        bind.execute(text(statement))
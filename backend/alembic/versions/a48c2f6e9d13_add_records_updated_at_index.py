@@ -0,0 +1,36 @@
+"""add updated_at index on records
+
+Revision ID: a48c2f6e9d13
+Revises: f19c4e7a2b68
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a48c2f6e9d13"
+down_revision: Union[str, None] = "f19c4e7a2b68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX_NAME = "ix_records_updated_at"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # 还没有建表的新库由应用启动时按模型建表（含该索引）
+    if "records" not in inspector.get_table_names():
+        return
+    indexes = {i["name"] for i in inspector.get_indexes("records")}
+    if INDEX_NAME not in indexes:
+        op.create_index(INDEX_NAME, "records", ["updated_at"])
+
+
+def downgrade() -> None:
+    if "records" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.drop_index(INDEX_NAME, table_name="records")
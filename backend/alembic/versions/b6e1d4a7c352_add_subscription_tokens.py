@@ -0,0 +1,46 @@
+"""add subscription_tokens table
+
+Revision ID: b6e1d4a7c352
+Revises: a48c2f6e9d13
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b6e1d4a7c352"
+down_revision: Union[str, None] = "a48c2f6e9d13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLE = "subscription_tokens"
+
+
+def upgrade() -> None:
+    # 表由 Base.metadata.create_all 创建，新库可能已经存在
+    inspector = sa.inspect(op.get_bind())
+    if TABLE in inspector.get_table_names():
+        return
+
+    op.create_table(
+        TABLE,
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("token", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("filters", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(f"ix_{TABLE}_token", TABLE, ["token"], unique=True)
+    op.create_index(f"ix_{TABLE}_user_id", TABLE, ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index(f"ix_{TABLE}_user_id", table_name=TABLE)
+    op.drop_index(f"ix_{TABLE}_token", table_name=TABLE)
+    op.drop_table(TABLE)
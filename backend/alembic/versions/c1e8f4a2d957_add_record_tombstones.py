@@ -0,0 +1,98 @@
+"""add record_tombstones and encrypt calendar sync credentials
+
+Revision ID: c1e8f4a2d957
+Revises: 9a2d6c4b8e31
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import base64
+import hashlib
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c1e8f4a2d957"
+down_revision: Union[str, None] = "9a2d6c4b8e31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLE = "record_tombstones"
+
+
+def _fernet():
+    # 与 app.services.caldav_sync 相同的密钥派生方式（本版本）
+    from cryptography.fernet import Fernet
+    from app.config import get_settings
+
+    key = hashlib.sha256(get_settings().secret_key.encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    # 表由 Base.metadata.create_all 创建，新库可能已经存在
+    if TABLE not in tables:
+        op.create_table(
+            TABLE,
+            sa.Column("record_id", sa.String(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("record_id"),
+        )
+        op.create_index(f"ix_{TABLE}_deleted_at", TABLE, ["deleted_at"])
+
+    if "calendar_sync_items" in tables and "records" in tables:
+        # 此前删除、但远端资源仍在的记录补一条删除记录，下次同步时删除远端资源
+        bind.execute(
+            sa.text(
+                f"INSERT INTO {TABLE} (record_id, deleted_at) "
+                "SELECT DISTINCT record_id, :now FROM calendar_sync_items "
+                "WHERE record_id NOT IN (SELECT id FROM records) "
+                f"AND record_id NOT IN (SELECT record_id FROM {TABLE})"
+            ),
+            {"now": datetime.utcnow()},
+        )
+
+    if "calendar_syncs" in tables:
+        # 上一版本以明文 JSON 保存认证信息，改为加密保存
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, auth_data FROM calendar_syncs WHERE auth_data LIKE '{%'"
+            )
+        ).all()
+        fernet = _fernet() if rows else None
+        for sync_id, auth_data in rows:
+            sealed = fernet.encrypt(auth_data.encode()).decode()
+            _set_auth_data(bind, sync_id, sealed)
+
+
+def _set_auth_data(bind, sync_id: str, auth_data: str) -> None:
+    bind.execute(
+        sa.text("UPDATE calendar_syncs SET auth_data = :auth_data WHERE id = :id"),
+        {"auth_data": auth_data, "id": sync_id},
+    )
+
+
+def downgrade() -> None:
+    # 上一版本只能读取明文认证信息
+    bind = op.get_bind()
+    rows = []
+    if "calendar_syncs" in sa.inspect(bind).get_table_names():
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, auth_data FROM calendar_syncs "
+                "WHERE auth_data IS NOT NULL AND auth_data NOT LIKE '{%'"
+            )
+        ).all()
+    fernet = _fernet() if rows else None
+    for sync_id, auth_data in rows:
+        _set_auth_data(bind, sync_id, fernet.decrypt(auth_data.encode()).decode())
+
+    op.drop_index(f"ix_{TABLE}_deleted_at", table_name=TABLE)
+    op.drop_table(TABLE)
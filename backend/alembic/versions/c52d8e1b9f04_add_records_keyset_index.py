@@ -0,0 +1,36 @@
+"""add (created_at, id) index on records
+
+Revision ID: c52d8e1b9f04
+Revises: 8b4e6d2f1a37
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c52d8e1b9f04"
+down_revision: Union[str, None] = "8b4e6d2f1a37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX_NAME = "ix_records_created_at_id"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # 还没有建表的新库由应用启动时按模型建表（含该索引）
+    if "records" not in inspector.get_table_names():
+        return
+    indexes = {i["name"] for i in inspector.get_indexes("records")}
+    if INDEX_NAME not in indexes:
+        op.create_index(INDEX_NAME, "records", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    if "records" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.drop_index(INDEX_NAME, table_name="records")
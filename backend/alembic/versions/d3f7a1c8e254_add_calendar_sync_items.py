@@ -0,0 +1,53 @@
+"""add calendar_syncs.calendar_url and calendar_sync_items table
+
+Revision ID: d3f7a1c8e254
+Revises: b6e1d4a7c352
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d3f7a1c8e254"
+down_revision: Union[str, None] = "b6e1d4a7c352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SYNCS = "calendar_syncs"
+ITEMS = "calendar_sync_items"
+
+
+def upgrade() -> None:
+    # 表由 Base.metadata.create_all 创建，新库可能已经带有该列和表。
+    # enabled / last_sync_at 在模型中改为 Boolean / DateTime：SQLite 按类型亲和存储，
+    # 旧表无需重建
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if SYNCS in tables:
+        columns = {column["name"] for column in inspector.get_columns(SYNCS)}
+        if "calendar_url" not in columns:
+            op.add_column(SYNCS, sa.Column("calendar_url", sa.String(), nullable=True))
+
+    if ITEMS not in tables:
+        op.create_table(
+            ITEMS,
+            sa.Column("sync_id", sa.String(), nullable=False),
+            sa.Column("record_id", sa.String(), nullable=False),
+            sa.Column("href", sa.String(), nullable=False),
+            sa.Column("etag", sa.String(), nullable=True),
+            sa.Column("record_updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["sync_id"], [f"{SYNCS}.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("sync_id", "record_id"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table(ITEMS)
+    if SYNCS in sa.inspect(op.get_bind()).get_table_names():
+        with op.batch_alter_table(SYNCS) as batch_op:
+            batch_op.drop_column("calendar_url")
@@ -0,0 +1,65 @@
+"""add indexes for server-side record filters
+
+Revision ID: e7a3b5c90d21
+Revises: c52d8e1b9f04
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e7a3b5c90d21"
+down_revision: Union[str, None] = "c52d8e1b9f04"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("simple_records", "ix_simple_records_period_time", ["period", "time"]),
+    ("simple_records", "ix_simple_records_time", ["time"]),
+    (
+        "payment_records",
+        "ix_payment_records_direction_period_amount",
+        ["direction", "period", "amount"],
+    ),
+    ("payment_records", "ix_payment_records_currency_amount", ["currency", "amount"]),
+    ("payment_records", "ix_payment_records_start_time", ["start_time"]),
+    (
+        "record_categories",
+        "ix_record_categories_category_id_record_id",
+        ["category_id", "record_id"],
+    ),
+    (
+        "record_payment_methods",
+        "ix_record_payment_methods_payment_method_id_record_id",
+        ["payment_method_id", "record_id"],
+    ),
+    ("categories", "ix_categories_name", ["name"]),
+    ("payment_methods", "ix_payment_methods_name", ["name"]),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # 还没有建表的新库由应用启动时按模型建表（含这些索引）
+    tables = inspector.get_table_names()
+    for table, name, columns in INDEXES:
+        if table not in tables:
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    for table, name, _ in reversed(INDEXES):
+        if table not in tables:
+            continue
+        if name not in {i["name"] for i in inspector.get_indexes(table)}:
+            continue
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,174 @@
+"""add FTS5 full-text index for record search
+
+Revision ID: f19c4e7a2b68
+Revises: e7a3b5c90d21
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+revision: str = "f19c4e7a2b68"
+down_revision: Union[str, None] = "e7a3b5c90d21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 迁移内联本版本的 DDL，不依赖之后可能变化的 app.services.search_service
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+        name, description, notes,
+        content='record_search', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS record_search (
+        id INTEGER PRIMARY KEY,
+        record_id VARCHAR NOT NULL UNIQUE,
+        name VARCHAR,
+        description VARCHAR,
+        notes VARCHAR
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_ai AFTER INSERT ON record_search
+    BEGIN
+        INSERT INTO records_fts (rowid, name, description, notes)
+        VALUES (new.id, new.name, new.description, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_ad AFTER DELETE ON record_search
+    BEGIN
+        INSERT INTO records_fts (records_fts, rowid, name, description, notes)
+        VALUES ('delete', old.id, old.name, old.description, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_au AFTER UPDATE ON record_search
+    BEGIN
+        INSERT INTO records_fts (records_fts, rowid, name, description, notes)
+        VALUES ('delete', old.id, old.name, old.description, old.notes);
+        INSERT INTO records_fts (rowid, name, description, notes)
+        VALUES (new.id, new.name, new.description, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS simple_records_search_ai
+    AFTER INSERT ON simple_records
+    BEGIN
+        INSERT INTO record_search (record_id, name, description)
+        VALUES (new.record_id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS simple_records_search_au
+    AFTER UPDATE OF name, description ON simple_records
+    BEGIN
+        UPDATE record_search SET name = new.name, description = new.description
+        WHERE record_id = new.record_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS simple_records_search_ad
+    AFTER DELETE ON simple_records
+    BEGIN
+        DELETE FROM record_search WHERE record_id = old.record_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS payment_records_search_ai
+    AFTER INSERT ON payment_records
+    BEGIN
+        INSERT INTO record_search (record_id, name, description, notes)
+        VALUES (new.record_id, new.name, new.description, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS payment_records_search_au
+    AFTER UPDATE OF name, description, notes ON payment_records
+    BEGIN
+        UPDATE record_search
+        SET name = new.name, description = new.description, notes = new.notes
+        WHERE record_id = new.record_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS payment_records_search_ad
+    AFTER DELETE ON payment_records
+    BEGIN
+        DELETE FROM record_search WHERE record_id = old.record_id;
+    END
+    """,
+]
+
+FTS_BACKFILL = [
+    """
+    INSERT INTO record_search (record_id, name, description)
+    SELECT record_id, name, description FROM simple_records
+    WHERE record_id NOT IN (SELECT record_id FROM record_search)
+    """,
+    """
+    INSERT INTO record_search (record_id, name, description, notes)
+    SELECT record_id, name, description, notes FROM payment_records
+    WHERE record_id NOT IN (SELECT record_id FROM record_search)
+    """,
+]
+
+FTS_DROP = [
+    "DROP TRIGGER IF EXISTS payment_records_search_ad",
+    "DROP TRIGGER IF EXISTS payment_records_search_au",
+    "DROP TRIGGER IF EXISTS payment_records_search_ai",
+    "DROP TRIGGER IF EXISTS simple_records_search_ad",
+    "DROP TRIGGER IF EXISTS simple_records_search_au",
+    "DROP TRIGGER IF EXISTS simple_records_search_ai",
+    "DROP TRIGGER IF EXISTS record_search_au",
+    "DROP TRIGGER IF EXISTS record_search_ad",
+    "DROP TRIGGER IF EXISTS record_search_ai",
+    "DROP TABLE IF EXISTS records_fts",
+    "DROP TABLE IF EXISTS record_search",
+]
+
+
+def upgrade() -> None:
+    # 仅 SQLite：创建 record_search / records_fts 与同步触发器，并补录已有记录
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    tables = set(
+        bind.execute(
+            text(
+                "SELECT name FROM sqlite_master "
+                "WHERE name IN ('records', 'record_search')"
+            )
+        ).scalars()
+    )
+    # 还没有建表的新库由应用启动时建表并建立搜索索引
+    if "records" not in tables:
+        return
+    exists = "record_search" in tables
+    try:
+        bind.execute(text(FTS_DDL[0]))
+    except OperationalError:
+        # trigram 分词器需要 SQLite 3.34+ 且启用 FTS5，不满足时搜索改用 LIKE
+        return
+
+    for statement in FTS_DDL[1:]:
+        bind.execute(text(statement))
+    if not exists:
+        for statement in FTS_BACKFILL:
+            bind.execute(text(statement))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for statement in FTS_DROP:
+        bind.execute(text(statement))
@@ -1,85 +1,400 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from app.database import get_db
-from app.models.record import BaseRecord, SimpleRecord, PaymentRecord
-from app.models.base import Direction
+from typing import Iterator
+import weakref
+from app.database import SessionLocal, get_db
+from app.models.record import SimpleRecord, PaymentRecord
+from app.models.base import RecordType
+from app.api.records import sparse_fields
+from app.schemas.support import (
+    CalendarSyncCreate,
+    CalendarSyncResponse,
+    CalendarSyncResult,
+    SubscriptionCreate,
+    SubscriptionFilters,
+    SubscriptionResponse,
+)
+from app.services.feed_cache import FeedVersion
 from app.services.ical_service import ICalService
+from app.services.period_calculator import count_occurrences_batch, expand_occurrences
+from app.services.single_flight import SingleFlight, single_flight
+from app.services.record_serializer import (
+    RECORD_ROWS,
+    projection_select,
+    serialize_projection,
+    serialize_rows,
+)
 
 router = APIRouter(prefix="/calendar", tags=["calendar"])
 
 
-def get_record_date(record: BaseRecord) -> datetime:
-    if isinstance(record, SimpleRecord):
-        return datetime.fromisoformat(record.time)
-    elif isinstance(record, PaymentRecord):
-        return datetime.fromisoformat(record.start_time)
-    else:
-        return datetime.fromisoformat(record.created_at)
+def _schedule(row, fields: list[str] | None) -> tuple:
+    """从查询行取出 (id, 开始时间, 周期, 结束时间)"""
+    if fields is not None:
+        return row._id, row._start, row._period, row._end
+    if row.type == RecordType.SIMPLE:
+        return row.id, row.simple_time, row.simple_period, None
+    return row.id, row.payment_start_time, row.payment_period, row.payment_end_time
 
 
-@router.get("/records")
-def get_calendar_records(
-    start_date: datetime, end_date: datetime, db: Session = Depends(get_db)
-):
+def _occurrence_events(
+    db: Session,
+    window_start: datetime,
+    window_end: datetime,
+    fields: list[str] | None,
+) -> ORJSONResponse:
+    """
+    按发生时间顺序返回 [window_start, window_end) 内的每一次发生
+
+    先用 time / start_time / end_time 上的索引范围条件取出可能发生的记录，
+    再向量化统计每条记录在窗口内的发生次数，只序列化并展开确有发生的记录。
+    传入 fields 时事件中的 record 只含这些字段。
+    """
+    simples = SimpleRecord.__table__.c
+    payments = PaymentRecord.__table__.c
+    query = RECORD_ROWS if fields is None else projection_select(fields)
+    rows = db.execute(query.where(simples.time < window_end)).all()
+    rows += db.execute(
+        query.where(
+            payments.start_time < window_end,
+            or_(payments.end_time.is_(None), payments.end_time >= window_start),
+        )
+    ).all()
+    if not rows:
+        return ORJSONResponse([])
+
+    schedules = [_schedule(row, fields) for row in rows]
+    _, starts, periods, ends = zip(*schedules)
+    counts = count_occurrences_batch(starts, periods, ends, [window_start, window_end])
+    occurring = counts[0].nonzero()[0]
+    rows = [rows[i] for i in occurring]
+    schedules = [schedules[i] for i in occurring]
+
+    now = datetime.utcnow()
     records = (
-        db.query(BaseRecord)
-        .filter(BaseRecord.created_at >= start_date, BaseRecord.created_at <= end_date)
-        .all()
+        serialize_rows(db, rows, now)
+        if fields is None
+        else serialize_projection(db, rows, fields, now)
+    )
+    by_id = {schedule[0]: record for schedule, record in zip(schedules, records)}
+    return ORJSONResponse(
+        [
+            {"id": record_id, "date": occurrence, "record": by_id[record_id]}
+            for record_id, occurrence in expand_occurrences(
+                schedules, window_start, window_end, ordered=True
+            )
+        ]
     )
 
-    result = []
-    for record in records:
-        event = {"id": record.id, "date": get_record_date(record), "record": record}
-        result.append(event)
 
-    return result
+@router.get("/records")
+def get_calendar_records(
+    start_date: datetime,
+    end_date: datetime,
+    fields: list[str] | None = Depends(sparse_fields),
+    db: Session = Depends(get_db),
+):
+    """返回 [start_date, end_date] 内每条记录的每一次发生（含周期重复）"""
+    return _occurrence_events(
+        db, start_date, end_date + timedelta(microseconds=1), fields
+    )
 
 
 @router.get("/month/{year}/{month}")
-def get_month_records(year: int, month: int, db: Session = Depends(get_db)):
+def get_month_records(
+    year: int,
+    month: int = Path(..., ge=1, le=12),
+    fields: list[str] | None = Depends(sparse_fields),
+    db: Session = Depends(get_db),
+):
+    """返回该自然月内每条记录的每一次发生（含周期重复）"""
     start_date = datetime(year, month, 1)
     if month == 12:
-        end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
+        end_date = datetime(year + 1, 1, 1)
     else:
-        end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+        end_date = datetime(year, month + 1, 1)
 
-    records = (
-        db.query(BaseRecord)
-        .filter(BaseRecord.created_at >= start_date, BaseRecord.created_at <= end_date)
-        .all()
+    return _occurrence_events(db, start_date, end_date, fields)
+
+
+@router.get("/summary/{year}")
+@single_flight("calendar.summary.year")
+def get_year_summary(year: int, db: Session = Depends(get_db)):
+    """全年每天的发生次数与收支合计（含周期重复），用于年度热力图"""
+    from app.services.stats_service import StatsService
+
+    return ORJSONResponse(
+        StatsService.daily_summary(db, datetime(year, 1, 1), datetime(year + 1, 1, 1))
     )
 
-    result = []
-    for record in records:
-        event = {"id": record.id, "date": get_record_date(record), "record": record}
-        result.append(event)
 
-    return result
+@router.get("/summary/{year}/{month}")
+@single_flight("calendar.summary.month")
+def get_month_summary(
+    year: int, month: int = Path(..., ge=1, le=12), db: Session = Depends(get_db)
+):
+    """该月每天的发生次数与收支合计（含周期重复），用于月视图格子"""
+    from app.services.stats_service import StatsService
+
+    start_date = datetime(year, month, 1)
+    if month == 12:
+        end_date = datetime(year + 1, 1, 1)
+    else:
+        end_date = datetime(year, month + 1, 1)
+
+    return ORJSONResponse(StatsService.daily_summary(db, start_date, end_date))
 
 
-@router.get("/subscriptions/token")
-def get_subscription_token():
-    token = "demo-token-123"
-    host = "localhost:8000"
+def _subscription_response(request: Request, subscription) -> dict:
+    from app.services.subscription_service import SubscriptionService
+
+    host = request.url.netloc
+    path = f"/api/v1/calendar/feed/{subscription.token}"
     return {
-        "webcal_url": f"webcal://{host}/api/v1/calendar/feed/{token}",
-        "http_url": f"http://{host}/api/v1/calendar/feed/{token}",
-        "google_url": f"https://www.google.com/calendar/render?cid=http://{host}/api/v1/calendar/feed/{token}",
+        "token": subscription.token,
+        "user_id": subscription.user_id,
+        "filters": SubscriptionService.filters(subscription),
+        "expires_at": subscription.expires_at,
+        "webcal_url": f"webcal://{host}{path}",
+        "http_url": f"http://{host}{path}",
+        "google_url": f"https://www.google.com/calendar/render?cid=http://{host}{path}",
     }
 
 
+@router.get("/subscriptions/token", response_model=SubscriptionResponse)
+def get_subscription_token(
+    request: Request, user_id: str = "default", db: Session = Depends(get_db)
+):
+    """
+    返回该用户不带筛选的订阅链接，没有未过期的令牌时签发一个
+
+    令牌有效期为 SUBSCRIPTION_TOKEN_EXPIRY_HOURS，日历客户端拉取订阅时自动顺延，
+    持续使用的链接不会失效。收付款记录限定为该用户的记录；简单提醒没有所属用户，
+    每个用户的订阅都包含全部简单提醒。
+    """
+    from app.services.subscription_service import SubscriptionService
+
+    subscription = SubscriptionService.default_token(db, user_id)
+    return _subscription_response(request, subscription)
+
+
+@router.post("/subscriptions", response_model=SubscriptionResponse)
+def create_subscription(
+    request: Request, data: SubscriptionCreate, db: Session = Depends(get_db)
+):
+    """
+    签发带筛选条件的订阅令牌（如只订阅收付款、只订阅某些分类）
+
+    有效期与顺延规则同 GET /subscriptions/token。简单提醒不按用户区分，
+    只想订阅自己的记录时用 type=payment 或任一收付款筛选条件排除简单提醒。
+    """
+    from app.services.subscription_service import SubscriptionService
+
+    filters = SubscriptionFilters(**data.model_dump(exclude={"user_id"}))
+    subscription = SubscriptionService.create(db, data.user_id, filters)
+    return _subscription_response(request, subscription)
+
+
+@router.delete("/subscriptions/{token}")
+def delete_subscription(token: str, db: Session = Depends(get_db)):
+    from app.models.support import SubscriptionToken
+    from app.services.feed_cache import FeedCache
+
+    subscription = (
+        db.query(SubscriptionToken).filter(SubscriptionToken.token == token).first()
+    )
+    if not subscription:
+        raise HTTPException(status_code=404, detail="订阅不存在")
+
+    db.delete(subscription)
+    db.commit()
+    FeedCache.invalidate(token)
+    return {"message": "订阅已删除"}
+
+
+@router.get("/sync-accounts", response_model=list[CalendarSyncResponse])
+def list_sync_accounts(db: Session = Depends(get_db)):
+    from app.models.support import CalendarSync
+
+    return db.query(CalendarSync).all()
+
+
+@router.post("/sync-accounts", response_model=CalendarSyncResponse)
+def create_sync_account(data: CalendarSyncCreate, db: Session = Depends(get_db)):
+    """添加推送目标（iCloud 或任意 CalDAV 日历集合）；密码加密后保存"""
+    from app.models.support import CalendarSync
+    from app.services.caldav_sync import CALDAV_PROVIDERS, CalDAVSyncService
+
+    if data.provider not in CALDAV_PROVIDERS:
+        raise HTTPException(status_code=400, detail="该日历类型不支持 CalDAV 推送")
+
+    sync = CalendarSync(
+        provider=data.provider,
+        account_id=data.account_id,
+        calendar_url=data.calendar_url,
+        enabled=data.enabled,
+        auth_data=CalDAVSyncService.seal_credentials(data.username, data.password),
+    )
+    db.add(sync)
+    db.commit()
+    db.refresh(sync)
+    return sync
+
+
+@router.delete("/sync-accounts/{sync_id}")
+def delete_sync_account(sync_id: str, db: Session = Depends(get_db)):
+    """删除推送目标（不删除远端日历上已推送的事件）"""
+    from app.models.support import CalendarSync, CalendarSyncItem
+
+    sync = db.query(CalendarSync).filter(CalendarSync.id == sync_id).first()
+    if not sync:
+        raise HTTPException(status_code=404, detail="同步账户不存在")
+
+    # SQLite 默认不启用外键约束，不能依赖 ON DELETE CASCADE
+    db.query(CalendarSyncItem).filter(CalendarSyncItem.sync_id == sync_id).delete()
+    db.delete(sync)
+    db.commit()
+    return {"message": "同步账户已删除"}
+
+
+@router.post("/sync-accounts/{sync_id}/sync", response_model=CalendarSyncResult)
+def run_sync_account(sync_id: str, db: Session = Depends(get_db)):
+    """立即执行一次增量推送"""
+    from app.models.support import CalendarSync
+    from app.services.caldav_sync import CalDAVSyncError, CalDAVSyncService
+
+    sync = db.query(CalendarSync).filter(CalendarSync.id == sync_id).first()
+    if not sync:
+        raise HTTPException(status_code=404, detail="同步账户不存在")
+
+    try:
+        return CalDAVSyncService.push(db, sync)
+    except CalDAVSyncError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# 订阅记录按批从游标读取，每批只为缓存未命中的记录加载 ORM 对象
+FEED_BATCH_SIZE = 500
+# 同一快照正在生成时，后到的请求最多等待的秒数，超时后自行生成
+FEED_WAIT_SECONDS = 30
+
+
+def _feed_chunks(conditions: list) -> Iterator[bytes]:
+    # 响应体在依赖项关闭会话之后才开始发送，流式渲染需要自己的会话
+    db = SessionLocal()
+    try:
+        yield from ICalService.stream_feed(db, FEED_BATCH_SIZE, conditions)
+    finally:
+        db.close()
+
+
+def _leading(key, call, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # 输出结束（内容已写入缓存）或中途断开时唤醒等待同一快照的请求
+    try:
+        yield from chunks
+    finally:
+        SingleFlight.release(key, call)
+
+
+def _prepare_feed(
+    db: Session,
+    token: str,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    accept_encoding: str | None,
+) -> tuple[Response | None, FeedVersion, list, dict]:
+    """
+    订阅中访问数据库的部分，在线程池中执行
+
+    返回 (可直接返回的响应, 数据版本, 筛选条件, 响应头)；
+    304 或缓存命中时第一项为响应，否则为 None，需要生成内容。
+    """
+    from app.config import get_settings
+    from app.services.feed_cache import FeedCache, accepts_gzip
+    from app.services.subscription_service import SubscriptionService
+
+    subscription = SubscriptionService.resolve(db, token)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="订阅不存在或已过期")
+    conditions = SubscriptionService.conditions(subscription)
+
+    encoding = (
+        "gzip"
+        if get_settings().ical_feed_gzip and accepts_gzip(accept_encoding)
+        else "identity"
+    )
+    feed = FeedCache.version(db, token, encoding, conditions)
+    headers = {
+        "ETag": feed.etag,
+        # 允许客户端缓存，但每次使用前必须带条件请求重新验证
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if feed.last_modified_header is not None:
+        headers["Last-Modified"] = feed.last_modified_header
+
+    if feed.not_modified(if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers), feed, conditions, headers
+
+    headers["Content-Disposition"] = 'attachment; filename="supcal.ics"'
+    if encoding == "gzip":
+        headers["Content-Encoding"] = "gzip"
+
+    body = FeedCache.body(feed)
+    if body is not None:
+        response = Response(content=body, media_type="text/calendar", headers=headers)
+        return response, feed, conditions, headers
+    return None, feed, conditions, headers
+
+
 @router.get("/feed/{token}")
-def get_ical_feed(token: str, db: Session = Depends(get_db)):
-    records = db.query(BaseRecord).all()
-    ical_content = ICalService.generate_subscription_ical(records)
-
-    return Response(
-        content=ical_content,
-        media_type="text/calendar",
-        headers={
-            "Content-Disposition": 'attachment; filename="supcal.ics"',
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-        },
+async def get_ical_feed(
+    token: str,
+    db: Session = Depends(get_db),
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+):
+    """
+    iCal 订阅
+
+    内容按令牌的筛选条件过滤，每个令牌各有一份快照：收付款记录限定为令牌所属用户，
+    简单提醒没有所属用户，所有用户的订阅都包含（未排除简单提醒时）。
+    令牌过期后返回 404；每次拉取会顺延有效期，持续订阅的链接不会过期。
+    ETag / Last-Modified 由数据版本得出：客户端带 If-None-Match / If-Modified-Since
+    轮询且数据未变化时直接返回 304，不加载记录也不重新生成日历。
+    需要生成时从 yield_per 游标边读边流式输出，客户端接受时按 gzip 压缩。
+
+    接口本身是异步的，数据库操作放到线程池执行：等待同一快照的请求在事件循环中
+    等待，不占用线程池线程，执行者流式输出时才有线程可用。
+    """
+    from app.services.feed_cache import FeedCache
+
+    response, feed, conditions, headers = await run_in_threadpool(
+        _prepare_feed, db, token, if_none_match, if_modified_since, accept_encoding
     )
+    if response is not None:
+        return response
+
+    # 同一快照正在由其他请求生成时，等它写入缓存后直接复用，而不是各自查询渲染
+    flight_key = ("calendar.feed", feed.key, feed.encoding, feed.version)
+    call, leader = SingleFlight.acquire(flight_key)
+    if not leader:
+        # 等待期间归还连接：执行者的流式生成要从连接池另取一个连接
+        await run_in_threadpool(db.close)
+        await call.wait_async(FEED_WAIT_SECONDS)
+        body = FeedCache.body(feed)
+        if body is not None:
+            return Response(content=body, media_type="text/calendar", headers=headers)
+        # 超过缓存大小上限的订阅不会写入缓存，只能自行生成
+
+    stream = FeedCache.stream(feed, _feed_chunks(conditions))
+    if leader:
+        stream = _leading(flight_key, call, stream)
+        # 客户端在开始输出前断开时生成器不会执行，回收时同样唤醒等待者
+        weakref.finalize(stream, SingleFlight.release, flight_key, call)
+    return StreamingResponse(stream, media_type="text/calendar", headers=headers)
@@ -1,82 +1,149 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 from datetime import datetime
+from itertools import chain
+from typing import Iterator, Literal
+import heapq
 from app.database import get_db
 from app.models.record import BaseRecord, SimpleRecord, PaymentRecord
-from app.models.base import Direction
-from app.services.period_calculator import calculate_next_occurrence_from_now
+from app.services.period_calculator import (
+    attach_next_occurrences,
+    calculate_next_occurrences_batch,
+)
+from app.services.single_flight import single_flight
+from app.services.stats_service import StatsService
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
+# rank_by 对应的排序列；月均金额与年化金额同序，共用同一个索引
+TOP_PAYMENT_RANK_COLUMNS = {
+    "amount": PaymentRecord.amount,
+    "annualized": PaymentRecord.annualized_amount,
+    "monthly": PaymentRecord.annualized_amount,
+}
+
+
 @router.get("/top-payments")
-def get_top_payments(limit: int = 10, db: Session = Depends(get_db)):
+@single_flight("dashboard.top-payments")
+def get_top_payments(
+    limit: int = 10,
+    rank_by: Literal["amount", "annualized", "monthly"] = "amount",
+    db: Session = Depends(get_db),
+):
     now = datetime.utcnow()
     payment_records = (
-        db.query(PaymentRecord).order_by(PaymentRecord.amount.desc()).limit(limit).all()
+        db.query(PaymentRecord)
+        .order_by(TOP_PAYMENT_RANK_COLUMNS[rank_by].desc())
+        .limit(limit)
+        .all()
     )
 
+    attach_next_occurrences(payment_records, now)
     for record in payment_records:
-        # 使用新的 calculate_next_occurrence_from_now 函数
-        record.next_occurrence = calculate_next_occurrence_from_now(
-            now, record.period, record.start_time
+        record.monthly_amount = (
+            record.annualized_amount / 12
+            if record.annualized_amount is not None
+            else None
         )
 
     return payment_records
 
 
-@router.get("/upcoming-simples")
-def get_upcoming_simples(limit: int = 10, db: Session = Depends(get_db)):
-    now = datetime.utcnow()
+UPCOMING_CHUNK_SIZE = 1000
 
-    # 获取所有记录（简单提醒 + 收付款）
-    simple_records = db.query(SimpleRecord).all()
-    payment_records = db.query(PaymentRecord).all()
 
-    # 合并所有记录并计算下一次发生时间
-    records_with_next = []
+def _iter_upcoming_candidates(
+    db: Session, model, start_column, now: datetime, limit: int
+) -> Iterator[tuple[datetime, str, type]]:
+    """逐行生成 (next_occurrence, record_id, model)，只读取轻量列，不加载 ORM 对象"""
+    # 已物化的 next_occurrence 走索引：ORDER BY next_occurrence LIMIT n
+    fresh_rows = db.execute(
+        select(model.next_occurrence, model.record_id)
+        .where(model.next_occurrence >= now)
+        .order_by(model.next_occurrence)
+        .limit(limit)
+    )
+    for next_occurrence, record_id in fresh_rows:
+        yield next_occurrence, record_id, model
+
+    # 定时任务尚未推进的过期行，按批流式读取并现场批量计算
+    stale_rows = db.execute(
+        select(model.record_id, start_column, model.period)
+        .where(or_(model.next_occurrence.is_(None), model.next_occurrence < now))
+        .execution_options(yield_per=UPCOMING_CHUNK_SIZE)
+    )
+    for chunk in stale_rows.partitions():
+        record_ids, starts, periods = zip(*chunk)
+        next_occurrences = calculate_next_occurrences_batch(starts, periods, now)
+        for next_occurrence, record_id in zip(next_occurrences.tolist(), record_ids):
+            yield next_occurrence, record_id, model
 
-    # 处理简单提醒
-    for record in simple_records:
-        next_occurrence = calculate_next_occurrence_from_now(
-            now, record.period, record.time
-        )
-        if next_occurrence:
-            record.next_occurrence = next_occurrence
-            records_with_next.append(record)
 
-    # 处理收付款记录
-    for record in payment_records:
-        # 使用新的 calculate_next_occurrence_from_now 函数
-        next_occurrence = calculate_next_occurrence_from_now(
-            now, record.period, record.start_time
-        )
-        if next_occurrence:
-            record.next_occurrence = next_occurrence
-            records_with_next.append(record)
+@router.get("/upcoming-simples")
+@single_flight("dashboard.upcoming-simples")
+def get_upcoming_simples(limit: int = 10, db: Session = Depends(get_db)):
+    now = datetime.utcnow()
 
-    # 按下次发生时间升序排序，取前 limit 条
-    records_with_next.sort(key=lambda x: x.next_occurrence)
+    # 合并简单提醒和收付款记录，用大小为 limit 的堆保留最早的 limit 条
+    candidates = chain(
+        _iter_upcoming_candidates(db, SimpleRecord, SimpleRecord.time, now, limit),
+        _iter_upcoming_candidates(
+            db, PaymentRecord, PaymentRecord.start_time, now, limit
+        ),
+    )
+    top = heapq.nsmallest(limit, candidates, key=lambda c: (c[0], c[1]))
 
-    return records_with_next[:limit]
+    # 只为最终返回的记录加载完整 ORM 对象
+    records_by_id = {}
+    for model in (SimpleRecord, PaymentRecord):
+        ids = [record_id for _, record_id, m in top if m is model]
+        if ids:
+            records_by_id.update(
+                (record.id, record)
+                for record in db.query(model).filter(model.id.in_(ids))
+            )
 
+    result = []
+    for next_occurrence, record_id, _ in top:
+        record = records_by_id[record_id]
+        record.next_occurrence = next_occurrence
+        result.append(record)
 
-@router.get("/summary")
-def get_summary(db: Session = Depends(get_db)):
-    now = datetime.utcnow()
-    month_start = datetime(now.year, now.month, 1)
+    return result
 
-    payment_records = (
-        db.query(PaymentRecord).filter(PaymentRecord.start_time >= month_start).all()
-    )
 
-    income = sum(r.amount for r in payment_records if r.direction == Direction.INCOME)
-    expense = sum(r.amount for r in payment_records if r.direction == Direction.EXPENSE)
+@router.get("/summary")
+@single_flight("dashboard.summary")
+def get_summary(
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    # 未指定区间时统计本月以来的收付款
+    if start is None and end is None:
+        now = datetime.utcnow()
+        start = datetime(now.year, now.month, 1)
+
+    totals = StatsService.payment_totals(db, start, end)
+
+    income = totals["income"]
+    expense = totals["expense"]
     balance = income - expense
 
     return {"income": income, "expense": expense, "balance": balance}
 
 
+@router.get("/forecast")
+@single_flight("dashboard.forecast")
+def get_forecast(
+    months: int = Query(12, ge=1, le=120), db: Session = Depends(get_db)
+):
+    """按收付款记录的周期预测未来 months 个月（含本月）的现金流"""
+    return StatsService.forecast(db, months, datetime.utcnow())
+
+
 def calculate_next_occurrence(
     base_date: datetime, period: str, start_date: datetime
 ) -> datetime:
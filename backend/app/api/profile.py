@@ -1,6 +1,7 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 import json
 import traceback
@@ -8,6 +9,9 @@ from ..models.record import SimpleRecord, PaymentRecord
 from ..models.support import Category, PaymentMethod
 from ..models.base import PeriodType, Direction
 from ..database import get_db
+from ..services.occurrence_service import OccurrenceService
+from ..services.single_flight import single_flight
+from ..services.stats_service import StatsService
 
 router = APIRouter(prefix="/profile", tags=["个人中心"])
 
@@ -50,7 +54,14 @@ async def export_records():
 
         # 获取所有收付款记录
         payment_records = (
-            db.execute(select(PaymentRecord).order_by(PaymentRecord.start_time.desc()))
+            db.execute(
+                select(PaymentRecord)
+                .options(
+                    selectinload(PaymentRecord.categories),
+                    selectinload(PaymentRecord.payment_methods),
+                )
+                .order_by(PaymentRecord.start_time.desc())
+            )
             .scalars()
             .all()
         )
@@ -163,6 +174,7 @@ async def import_records(file: UploadFile = File(...)):
 
         records = data["records"]
         db = next(get_db())
+        now = datetime.utcnow()
 
         result = {
             "success": True,
@@ -216,6 +228,7 @@ async def import_records(file: UploadFile = File(...)):
                         description=record.get("description", ""),
                         period=_parse_period(record.get("repeat_type", "month")),
                     )
+                    OccurrenceService.refresh(simple_record, now)
                     db.add(simple_record)
                     db.flush()
                     result["imported"] += 1
@@ -239,6 +252,7 @@ async def import_records(file: UploadFile = File(...)):
                         description=record.get("description", ""),
                         notes=record.get("notes", None),
                     )
+                    OccurrenceService.refresh(payment_record, now)
 
                     # 关联分类
                     categories = []
@@ -297,58 +311,43 @@ async def import_records(file: UploadFile = File(...)):
 
 
 @router.get("/stats")
-async def get_profile_stats():
+@single_flight("profile.stats")
+def get_profile_stats(
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+):
     """
     获取个人统计数据
+
+    可通过 from / to 限定统计区间（按记录时间），默认统计全部记录
     """
     try:
         db = next(get_db())
 
-        # 统计简单提醒数
-        simple_records = db.execute(select(SimpleRecord)).scalars().all()
-        simple_count = len(simple_records)
-
-        # 统计收付款记录和金额
-        payment_records = db.execute(select(PaymentRecord)).scalars().all()
-
-        payment_count = len(payment_records)
-        total_income = 0.0
-        total_expense = 0.0
-
-        for record in payment_records:
-            if record.direction == "income":
-                total_income += float(record.amount or 0)
-            elif record.direction == "expense":
-                total_expense += float(record.amount or 0)
+        # 统计简单提醒数、收付款记录数和金额（数据库端 COUNT / SUM）
+        simple_count = StatsService.simple_count(db, start, end)
+        payment_totals = StatsService.payment_totals(db, start, end)
 
         # 统计本月记录数
-        from datetime import datetime
-
-        current_month = datetime.utcnow().strftime("%Y-%m")
-
-        this_month_count = 0
-        for record in payment_records:
-            if record.start_time:
-                record_month = record.start_time.strftime("%Y-%m")
-                if record_month == current_month:
-                    this_month_count += 1
-
-        simple_records_month = (
-            db.execute(
-                select(SimpleRecord).where(SimpleRecord.time.like(f"{current_month}%"))
-            )
-            .scalars()
-            .all()
+        now = datetime.utcnow()
+        month_start = datetime(now.year, now.month, 1)
+        month_end = (
+            datetime(now.year + 1, 1, 1)
+            if now.month == 12
+            else datetime(now.year, now.month + 1, 1)
+        )
+        this_month_count = (
+            StatsService.payment_totals(db, month_start, month_end)["count"]
+            + StatsService.simple_count(db, month_start, month_end)
         )
-        this_month_count += len(simple_records_month)
 
         db.close()
 
         # 直接返回 stats 对象，与前端期望的格式一致
         return {
-            "total_records": simple_count + payment_count,
-            "total_income": round(total_income, 2),
-            "total_expense": round(total_expense, 2),
+            "total_records": simple_count + payment_totals["count"],
+            "total_income": round(payment_totals["income"], 2),
+            "total_expense": round(payment_totals["expense"], 2),
             "this_month_records": this_month_count,
         }
 
@@ -1,75 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import base64
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, selectinload, with_polymorphic
 from app.database import get_db
 from app.schemas.record import (
     SimpleRecordCreate,
     PaymentRecordCreate,
-    CustomRecordCreate,
     SimpleRecordResponse,
     PaymentRecordResponse,
     SimpleRecordUpdate,
     PaymentRecordUpdate,
+    RecordBatchCreate,
+    RecordBatchUpdate,
+    RecordBatchDelete,
 )
-from app.models.record import BaseRecord, SimpleRecord, PaymentRecord, CustomRecord
+from app.models.record import BaseRecord, SimpleRecord, PaymentRecord
+from app.models.base import RecordType, PeriodType, Direction
+from app.models.support import Category, PaymentMethod
+from app.services.record_serializer import (
+    RECORD_ROWS,
+    parse_fields,
+    projection_select,
+    serialize_projection,
+    serialize_record,
+    serialize_rows,
+)
+from app.services.record_filters import record_conditions
+from app.services.support_cache import SupportNameCache
 
 router = APIRouter(prefix="/records", tags=["records"])
 
+# 一次 LEFT OUTER JOIN 加载所有子类列，避免逐条补查子表
+AnyRecord = with_polymorphic(BaseRecord, "*")
+
+
+def _query_records(db: Session):
+    """查询记录，分类和付款方式通过 selectinload 批量加载（每个关系一条 IN 查询）"""
+    return db.query(AnyRecord).options(
+        selectinload(AnyRecord.PaymentRecord.categories),
+        selectinload(AnyRecord.PaymentRecord.payment_methods),
+    )
+
 
 @router.post("/simple", response_model=SimpleRecordResponse)
 def create_simple_record(data: SimpleRecordCreate, db: Session = Depends(get_db)):
     from datetime import datetime
-    from app.services.period_calculator import calculate_next_occurrence_from_now
+    from app.services.occurrence_service import OccurrenceService
 
     db_record = SimpleRecord(
         name=data.name, time=data.time, period=data.period, description=data.description
     )
+    OccurrenceService.refresh(db_record, datetime.utcnow())
     db.add(db_record)
     db.commit()
     db.refresh(db_record)
-    db_record.next_occurrence = calculate_next_occurrence_from_now(
-        datetime.utcnow(), db_record.period, db_record.time
-    )
-    return db_record
+    return ORJSONResponse(serialize_record(db_record))
 
 
-@router.post("/payment")
+@router.post("/payment", response_model=PaymentRecordResponse)
 def create_payment_record(data: PaymentRecordCreate, db: Session = Depends(get_db)):
     from datetime import datetime
-    from app.services.period_calculator import calculate_next_occurrence_from_now
-    from app.models.support import Category, PaymentMethod
+    from app.services.occurrence_service import OccurrenceService
 
     user_id = "default"
 
-    category_objects = []
-    if data.category:
-        for cat_name in data.category:
-            existing_category = (
-                db.query(Category)
-                .filter(Category.name == cat_name, Category.user_id == user_id)
-                .first()
-            )
-            if not existing_category:
-                existing_category = Category(name=cat_name, user_id=user_id)
-                db.add(existing_category)
-                db.flush()
-            category_objects.append(existing_category)
-
-    payment_method_objects = []
-    if data.payment_method:
-        for pm_name in data.payment_method:
-            existing_method = (
-                db.query(PaymentMethod)
-                .filter(
-                    PaymentMethod.name == pm_name,
-                    PaymentMethod.user_id == user_id,
-                )
-                .first()
-            )
-            if not existing_method:
-                existing_method = PaymentMethod(name=pm_name, user_id=user_id)
-                db.add(existing_method)
-                db.flush()
-            payment_method_objects.append(existing_method)
+    category_objects = SupportNameCache.resolve(db, Category, user_id, data.category)
+    payment_method_objects = SupportNameCache.resolve(
+        db, PaymentMethod, user_id, data.payment_method
+    )
 
     db_record = PaymentRecord(
         name=data.name,
@@ -86,181 +87,340 @@ def create_payment_record(data: PaymentRecordCreate, db: Session = Depends(get_d
     db_record.categories = category_objects
     db_record.payment_methods = payment_method_objects
 
+    OccurrenceService.refresh(db_record, datetime.utcnow())
+
     db.add(db_record)
     db.commit()
     db.refresh(db_record)
-    db_record.next_occurrence = calculate_next_occurrence_from_now(
-        datetime.utcnow(), db_record.period, db_record.start_time
+    return ORJSONResponse(serialize_record(db_record, empty_lists=True))
+
+
+def _encode_cursor(created_at: datetime | None, record_id: str) -> str:
+    stamp = created_at.isoformat() if created_at is not None else None
+    payload = json.dumps([stamp, record_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, str]:
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if created_at is None:
+            return None, str(record_id)
+        return datetime.fromisoformat(created_at), record_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def sparse_fields(
+    fields: str | None = Query(
+        None, description="逗号分隔的字段列表，例如 id,name,date,amount,direction"
+    ),
+) -> list[str] | None:
+    """解析 fields= 查询参数；未传入时返回 None 表示返回完整记录"""
+    if fields is None:
+        return None
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def record_filters(
+    record_type: RecordType | None = Query(None, alias="type"),
+    direction: Direction | None = None,
+    period: PeriodType | None = None,
+    category: list[str] | None = Query(None),
+    payment_method: list[str] | None = Query(None),
+    min_amount: float | None = None,
+    max_amount: float | None = None,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    currency: str | None = None,
+    user_id: str = "default",
+) -> list:
+    """
+    列表筛选参数；category / payment_method 可重复传入，匹配 user_id 名下任一名称
+    """
+    return record_conditions(
+        record_type=record_type,
+        direction=direction,
+        period=period,
+        category=category,
+        payment_method=payment_method,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        start=start,
+        end=end,
+        currency=currency,
+        user_id=user_id,
     )
 
-    return {
-        "id": db_record.id,
-        "type": db_record.type,
-        "created_at": db_record.created_at.isoformat()
-        if db_record.created_at
-        else None,
-        "updated_at": db_record.updated_at.isoformat()
-        if db_record.updated_at
-        else None,
-        "name": db_record.name,
-        "description": db_record.description,
-        "direction": db_record.direction.value if db_record.direction else None,
-        "category": [c.name for c in db_record.categories],
-        "amount": db_record.amount,
-        "payment_method": [pm.name for pm in db_record.payment_methods],
-        "period": db_record.period.value if db_record.period else None,
-        "start_time": db_record.start_time.isoformat()
-        if db_record.start_time
-        else None,
-        "end_time": db_record.end_time.isoformat() if db_record.end_time else None,
-        "notes": db_record.notes,
-        "currency": db_record.currency,
-        "next_occurrence": db_record.next_occurrence.isoformat()
-        if db_record.next_occurrence
-        else None,
-    }
 
+@router.get("", response_model=list[SimpleRecordResponse | PaymentRecordResponse])
+def get_records(
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+    fields: list[str] | None = Depends(sparse_fields),
+    conditions: list = Depends(record_filters),
+    db: Session = Depends(get_db),
+):
+    """
+    按 (created_at, id) 倒序返回记录
+
+    传入 limit 时按游标分页：还有下一页时通过 X-Next-Cursor 响应头返回游标，
+    下次请求带上 cursor 即可从该位置继续（keyset 分页，不使用 OFFSET）。
+    传入 fields 时只查询并返回这些字段；其余查询参数在数据库端筛选。
+    """
+    # 直接查询列元组，跳过 ORM 实例化
+    query = RECORD_ROWS if fields is None else projection_select(fields)
+    query = query.where(*conditions)
+    # created_at 为空的旧记录排在最后，按 id 倒序单独分页：
+    # NULL 参与元组比较的结果恒为 NULL，不能和其他记录放在同一个范围条件里
+    dated = query.where(BaseRecord.created_at.is_not(None)).order_by(
+        BaseRecord.created_at.desc(), BaseRecord.id.desc()
+    )
+    undated = query.where(BaseRecord.created_at.is_(None)).order_by(
+        BaseRecord.id.desc()
+    )
+    if cursor:
+        created_at, record_id = _decode_cursor(cursor)
+        if created_at is None:
+            dated = None
+            undated = undated.where(BaseRecord.id < record_id)
+        else:
+            dated = dated.where(
+                tuple_(BaseRecord.created_at, BaseRecord.id) < (created_at, record_id)
+            )
 
-@router.get("", response_model=list[dict])
-def get_records(db: Session = Depends(get_db)):
-    import json
-    from datetime import datetime
-    from app.services.period_calculator import calculate_next_occurrence_from_now
+    headers = {}
+    if limit is None:
+        rows = db.execute(dated).all() if dated is not None else []
+        rows += db.execute(undated).all()
+    else:
+        rows = db.execute(dated.limit(limit + 1)).all() if dated is not None else []
+        if len(rows) <= limit:
+            rows += db.execute(undated.limit(limit + 1 - len(rows))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            headers["X-Next-Cursor"] = (
+                _encode_cursor(last.created_at, last.id)
+                if fields is None
+                else _encode_cursor(last._created_at, last._id)
+            )
 
-    records = db.query(BaseRecord).order_by(BaseRecord.created_at.desc()).all()
     now = datetime.utcnow()
-    result = []
-
-    for record in records:
-        record_dict = {
-            "id": record.id,
-            "type": record.type,
-            "created_at": record.created_at.isoformat() if record.created_at else None,
-            "updated_at": record.updated_at.isoformat() if record.updated_at else None,
-        }
+    if fields is None:
+        return ORJSONResponse(serialize_rows(db, rows, now), headers=headers)
+    return ORJSONResponse(
+        serialize_projection(db, rows, fields, now), headers=headers
+    )
 
-        if isinstance(record, SimpleRecord):
-            record_dict.update(
-                {
-                    "name": record.name,
-                    "time": record.time.isoformat() if record.time else None,
-                    "period": record.period.value if record.period else None,
-                    "description": record.description,
-                }
-            )
-            record.next_occurrence = calculate_next_occurrence_from_now(
-                now, record.period, record.time
-            )
-            record_dict["next_occurrence"] = (
-                record.next_occurrence.isoformat() if record.next_occurrence else None
-            )
 
-        elif isinstance(record, PaymentRecord):
-            record_dict.update(
-                {
-                    "name": record.name,
-                    "description": record.description,
-                    "direction": record.direction.value if record.direction else None,
-                    "amount": record.amount,
-                    "period": record.period.value if record.period else None,
-                    "start_time": record.start_time.isoformat()
-                    if record.start_time
-                    else None,
-                    "end_time": record.end_time.isoformat()
-                    if record.end_time
-                    else None,
-                    "notes": record.notes,
-                    "currency": record.currency,
-                }
-            )
-            record.next_occurrence = calculate_next_occurrence_from_now(
-                now, record.period, record.start_time
-            )
-            record_dict["next_occurrence"] = (
-                record.next_occurrence.isoformat() if record.next_occurrence else None
-            )
+def _resolve_names(db: Session, model, user_id: str, name_lists) -> dict:
+    """一次性解析整批记录用到的全部名称，返回 name → 对象"""
+    names = list(dict.fromkeys(name for names in name_lists for name in names or []))
+    return dict(zip(names, SupportNameCache.resolve(db, model, user_id, names)))
 
-            record_dict["category"] = (
-                [c.name for c in record.categories] if record.categories else None
-            )
-            record_dict["payment_method"] = (
-                [pm.name for pm in record.payment_methods]
-                if record.payment_methods
-                else None
-            )
 
-        result.append(record_dict)
+@router.post("/batch")
+def create_records_batch(data: RecordBatchCreate, db: Session = Depends(get_db)):
+    """批量创建简单提醒 / 收付款记录，整批在同一事务中提交"""
+    from app.services.occurrence_service import OccurrenceService
 
-    return result
+    user_id = "default"
+    now = datetime.utcnow()
+    payments = [item for item in data.records if item.type == RecordType.PAYMENT]
+    categories = _resolve_names(
+        db, Category, user_id, (item.category for item in payments)
+    )
+    payment_methods = _resolve_names(
+        db, PaymentMethod, user_id, (item.payment_method for item in payments)
+    )
 
+    db_records = []
+    for item in data.records:
+        if item.type == RecordType.SIMPLE:
+            db_record = SimpleRecord(
+                name=item.name,
+                time=item.time,
+                period=item.period,
+                description=item.description,
+            )
+        else:
+            db_record = PaymentRecord(
+                name=item.name,
+                description=item.description,
+                direction=item.direction,
+                amount=item.amount,
+                period=item.period,
+                start_time=item.start_time,
+                end_time=item.end_time,
+                notes=item.notes,
+                currency=item.currency,
+                user_id=user_id,
+            )
+            db_record.categories = [
+                categories[name] for name in dict.fromkeys(item.category or [])
+            ]
+            db_record.payment_methods = [
+                payment_methods[name]
+                for name in dict.fromkeys(item.payment_method or [])
+            ]
+        OccurrenceService.refresh(db_record, now)
+        db_records.append(db_record)
+
+    # 同一 mapper 的 INSERT 在一次 flush 中合并执行
+    db.add_all(db_records)
+    db.flush()
+    # 提交后对象会过期，主键在提交前取出，避免逐条重新加载
+    results = [
+        {"index": index, "id": db_record.id, "type": item.type, "status": "created"}
+        for index, (item, db_record) in enumerate(zip(data.records, db_records))
+    ]
+    db.commit()
+    return results
 
-@router.get("/{record_id}", response_model=dict)
-def get_record(record_id: str, db: Session = Depends(get_db)):
-    import json
-    from datetime import datetime
-    from app.services.period_calculator import calculate_next_occurrence_from_now
 
-    record = db.query(BaseRecord).filter(BaseRecord.id == record_id).first()
-    if not record:
-        raise HTTPException(status_code=404, detail="Record not found")
+@router.put("/batch")
+def update_records_batch(data: RecordBatchUpdate, db: Session = Depends(get_db)):
+    """批量更新记录，返回逐条结果；不存在或类型不符的条目跳过"""
+    from app.services.occurrence_service import OccurrenceService
 
     now = datetime.utcnow()
-    record_dict = {
-        "id": record.id,
-        "type": record.type,
-        "created_at": record.created_at.isoformat() if record.created_at else None,
-        "updated_at": record.updated_at.isoformat() if record.updated_at else None,
+    records = {
+        record.id: record
+        for record in _query_records(db).filter(
+            AnyRecord.id.in_([item.id for item in data.records])
+        )
     }
 
-    if isinstance(record, SimpleRecord):
-        record_dict.update(
-            {
-                "name": record.name,
-                "time": record.time.isoformat() if record.time else None,
-                "period": record.period.value if record.period else None,
-                "description": record.description,
-            }
+    payments = [
+        (item, records[item.id])
+        for item in data.records
+        if item.type == RecordType.PAYMENT
+        and isinstance(records.get(item.id), PaymentRecord)
+    ]
+    categories = {}
+    payment_methods = {}
+    for user_id in {record.user_id or "default" for _, record in payments}:
+        items = [
+            item
+            for item, record in payments
+            if (record.user_id or "default") == user_id
+        ]
+        categories[user_id] = _resolve_names(
+            db, Category, user_id, (item.category for item in items)
         )
-        record.next_occurrence = calculate_next_occurrence_from_now(
-            now, record.period, record.time
-        )
-        record_dict["next_occurrence"] = (
-            record.next_occurrence.isoformat() if record.next_occurrence else None
+        payment_methods[user_id] = _resolve_names(
+            db, PaymentMethod, user_id, (item.payment_method for item in items)
         )
 
-    elif isinstance(record, PaymentRecord):
-        record_dict.update(
-            {
-                "name": record.name,
-                "description": record.description,
-                "direction": record.direction.value if record.direction else None,
-                "amount": record.amount,
-                "period": record.period.value if record.period else None,
-                "start_time": record.start_time.isoformat()
-                if record.start_time
-                else None,
-                "end_time": record.end_time.isoformat() if record.end_time else None,
-                "notes": record.notes,
-                "currency": record.currency,
-            }
-        )
-        record.next_occurrence = calculate_next_occurrence_from_now(
-            now, record.period, record.start_time
-        )
-        record_dict["next_occurrence"] = (
-            record.next_occurrence.isoformat() if record.next_occurrence else None
-        )
+    results = []
+    for index, item in enumerate(data.records):
+        record = records.get(item.id)
+        result = {"index": index, "id": item.id, "type": item.type}
+        results.append(result)
+        if record is None:
+            result["status"] = "not_found"
+            continue
+        if record.type != item.type:
+            result["status"] = "type_mismatch"
+            continue
+
+        if item.type == RecordType.SIMPLE:
+            record.name = item.name
+            record.time = item.time
+            record.period = item.period
+            record.description = item.description
+        else:
+            user_id = record.user_id or "default"
+            record.name = item.name
+            record.description = item.description
+            record.direction = item.direction
+            record.amount = item.amount
+            record.period = item.period
+            record.start_time = item.start_time
+            record.end_time = item.end_time
+            record.notes = item.notes
+            record.currency = item.currency
+            record.categories = [
+                categories[user_id][name] for name in dict.fromkeys(item.category or [])
+            ]
+            record.payment_methods = [
+                payment_methods[user_id][name]
+                for name in dict.fromkeys(item.payment_method or [])
+            ]
+        OccurrenceService.refresh(record, now)
+        result["status"] = "updated"
 
-        record_dict["category"] = (
-            [c.name for c in record.categories] if record.categories else None
-        )
-        record_dict["payment_method"] = (
-            [pm.name for pm in record.payment_methods]
-            if record.payment_methods
-            else None
-        )
+    db.commit()
+    return results
+
+
+@router.delete("/batch")
+def delete_records_batch(data: RecordBatchDelete, db: Session = Depends(get_db)):
+    """批量删除记录，返回逐条结果"""
+    records = {
+        record.id: record
+        # 预先加载关联，删除时清理关联表不再逐条查询
+        for record in _query_records(db).filter(AnyRecord.id.in_(data.ids))
+    }
+    for record in records.values():
+        db.delete(record)
+    db.commit()
+
+    return [
+        {
+            "index": index,
+            "id": record_id,
+            "status": "deleted" if record_id in records else "not_found",
+        }
+        for index, record_id in enumerate(data.ids)
+    ]
+
+
+@router.get(
+    "/search", response_model=list[SimpleRecordResponse | PaymentRecordResponse]
+)
+def search_records(
+    q: str = Query(..., min_length=1, description="搜索词，空格分隔的多个词需同时匹配"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    fields: list[str] | None = Depends(sparse_fields),
+    db: Session = Depends(get_db),
+):
+    """按名称、描述、备注搜索记录，结果按相关度排序"""
+    from app.services.search_service import SearchService
+
+    ids = SearchService.search_ids(db, q, limit, offset)
+    if not ids:
+        return ORJSONResponse([])
+
+    query = RECORD_ROWS if fields is None else projection_select(fields)
+    rows = db.execute(query.where(BaseRecord.id.in_(ids))).all()
+    # 按搜索结果的排序输出
+    order = {record_id: i for i, record_id in enumerate(ids)}
+    rows.sort(key=lambda row: order[row.id if fields is None else row._id])
+
+    now = datetime.utcnow()
+    if fields is None:
+        return ORJSONResponse(serialize_rows(db, rows, now))
+    return ORJSONResponse(serialize_projection(db, rows, fields, now))
 
-    return record_dict
+
+@router.get(
+    "/{record_id}", response_model=SimpleRecordResponse | PaymentRecordResponse
+)
+def get_record(record_id: str, db: Session = Depends(get_db)):
+    from app.services.period_calculator import attach_next_occurrences
+
+    record = _query_records(db).filter(AnyRecord.id == record_id).first()
+    if not record:
+        raise HTTPException(status_code=404, detail="Record not found")
+
+    attach_next_occurrences([record], datetime.utcnow())
+    return ORJSONResponse(serialize_record(record))
 
 
 @router.delete("/{record_id}")
@@ -278,7 +438,7 @@ def update_simple_record(
     record_id: str, data: SimpleRecordUpdate, db: Session = Depends(get_db)
 ):
     from datetime import datetime
-    from app.services.period_calculator import calculate_next_occurrence_from_now
+    from app.services.occurrence_service import OccurrenceService
 
     record = db.query(SimpleRecord).filter(SimpleRecord.id == record_id).first()
     if not record:
@@ -288,22 +448,19 @@ def update_simple_record(
     record.time = data.time
     record.period = data.period
     record.description = data.description
+    OccurrenceService.refresh(record, datetime.utcnow())
 
     db.commit()
     db.refresh(record)
-    record.next_occurrence = calculate_next_occurrence_from_now(
-        datetime.utcnow(), record.period, record.time
-    )
-    return record
+    return ORJSONResponse(serialize_record(record))
 
 
-@router.put("/payment/{record_id}")
+@router.put("/payment/{record_id}", response_model=PaymentRecordResponse)
 def update_payment_record(
     record_id: str, data: PaymentRecordUpdate, db: Session = Depends(get_db)
 ):
     from datetime import datetime
-    from app.services.period_calculator import calculate_next_occurrence_from_now
-    from app.models.support import Category, PaymentMethod
+    from app.services.occurrence_service import OccurrenceService
 
     record = db.query(PaymentRecord).filter(PaymentRecord.id == record_id).first()
     if not record:
@@ -311,36 +468,10 @@ def update_payment_record(
 
     user_id = record.user_id or "default"
 
-    category_objects = []
-    if data.category:
-        for cat_name in data.category:
-            existing_category = (
-                db.query(Category)
-                .filter(Category.name == cat_name, Category.user_id == user_id)
-                .first()
-            )
-            if not existing_category:
-                existing_category = Category(name=cat_name, user_id=user_id)
-                db.add(existing_category)
-                db.flush()
-            category_objects.append(existing_category)
-
-    payment_method_objects = []
-    if data.payment_method:
-        for pm_name in data.payment_method:
-            existing_method = (
-                db.query(PaymentMethod)
-                .filter(
-                    PaymentMethod.name == pm_name,
-                    PaymentMethod.user_id == user_id,
-                )
-                .first()
-            )
-            if not existing_method:
-                existing_method = PaymentMethod(name=pm_name, user_id=user_id)
-                db.add(existing_method)
-                db.flush()
-            payment_method_objects.append(existing_method)
+    category_objects = SupportNameCache.resolve(db, Category, user_id, data.category)
+    payment_method_objects = SupportNameCache.resolve(
+        db, PaymentMethod, user_id, data.payment_method
+    )
 
     record.name = data.name
     record.description = data.description
@@ -354,30 +485,8 @@ def update_payment_record(
 
     record.categories = category_objects
     record.payment_methods = payment_method_objects
+    OccurrenceService.refresh(record, datetime.utcnow())
 
     db.commit()
     db.refresh(record)
-    record.next_occurrence = calculate_next_occurrence_from_now(
-        datetime.utcnow(), record.period, record.start_time
-    )
-
-    return {
-        "id": record.id,
-        "type": record.type,
-        "created_at": record.created_at.isoformat() if record.created_at else None,
-        "updated_at": record.updated_at.isoformat() if record.updated_at else None,
-        "name": record.name,
-        "description": record.description,
-        "direction": record.direction.value if record.direction else None,
-        "category": [c.name for c in record.categories],
-        "amount": record.amount,
-        "payment_method": [pm.name for pm in record.payment_methods],
-        "period": record.period.value if record.period else None,
-        "start_time": record.start_time.isoformat() if record.start_time else None,
-        "end_time": record.end_time.isoformat() if record.end_time else None,
-        "notes": record.notes,
-        "currency": record.currency,
-        "next_occurrence": record.next_occurrence.isoformat()
-        if record.next_occurrence
-        else None,
-    }
+    return ORJSONResponse(serialize_record(record, empty_lists=True))
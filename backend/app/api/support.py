@@ -1,4 +1,6 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.support import (
@@ -10,11 +12,33 @@ from app.schemas.support import (
     PaymentMethodResponse,
 )
 from app.models.support import Category, PaymentMethod
-from app.models.record import PaymentRecord
+from app.models.record import (
+    BaseRecord,
+    PaymentRecord,
+    record_categories,
+    record_payment_methods,
+)
+from app.services.support_cache import SupportNameCache
 
 router = APIRouter(prefix="/support", tags=["support"])
 
 
+def _touch_linked_records(db: Session, association, column_name: str, item_id: str):
+    """改名后刷新关联记录的 updated_at，使依赖它的缓存（如日历订阅）失效"""
+    records = BaseRecord.__table__
+    db.execute(
+        update(records)
+        .where(
+            records.c.id.in_(
+                select(association.c.record_id).where(
+                    association.c[column_name] == item_id
+                )
+            )
+        )
+        .values(updated_at=datetime.utcnow())
+    )
+
+
 @router.post("/categories", response_model=CategoryResponse)
 def create_category(data: CategoryCreate, db: Session = Depends(get_db)):
     user_id = data.user_id or "default"
@@ -22,11 +46,13 @@ def create_category(data: CategoryCreate, db: Session = Depends(get_db)):
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    SupportNameCache.invalidate(Category, user_id)
     return db_category
 
 
 @router.get("/categories", response_model=list[CategoryResponse])
 def get_categories(user_id: str = "default", db: Session = Depends(get_db)):
+    # 直接查询整行：名称没有唯一约束，name → id 缓存会丢掉同名的分类
     return db.query(Category).filter(Category.user_id == user_id).all()
 
 
@@ -38,11 +64,13 @@ def update_category(
     if not category:
         raise HTTPException(status_code=404, detail="分类不存在")
 
-    if data.name is not None:
+    if data.name is not None and data.name != category.name:
         category.name = data.name
+        _touch_linked_records(db, record_categories, "category_id", category_id)
 
     db.commit()
     db.refresh(category)
+    SupportNameCache.invalidate(Category, category.user_id)
     return category
 
 
@@ -58,8 +86,10 @@ def delete_category(category_id: str, db: Session = Depends(get_db)):
             detail=f"分类「{category.name}」被 {len(category.records)} 条记录使用，无法删除",
         )
 
+    user_id = category.user_id
     db.delete(category)
     db.commit()
+    SupportNameCache.invalidate(Category, user_id)
     return {"message": "分类已删除"}
 
 
@@ -78,6 +108,7 @@ def create_payment_method(data: PaymentMethodCreate, db: Session = Depends(get_d
     db.add(db_method)
     db.commit()
     db.refresh(db_method)
+    SupportNameCache.invalidate(PaymentMethod, user_id)
     return db_method
 
 
@@ -94,11 +125,15 @@ def update_payment_method(
     if not method:
         raise HTTPException(status_code=404, detail="付款方式不存在")
 
-    if data.name is not None:
+    if data.name is not None and data.name != method.name:
         method.name = data.name
+        _touch_linked_records(
+            db, record_payment_methods, "payment_method_id", method_id
+        )
 
     db.commit()
     db.refresh(method)
+    SupportNameCache.invalidate(PaymentMethod, method.user_id)
     return method
 
 
@@ -114,8 +149,10 @@ def delete_payment_method(method_id: str, db: Session = Depends(get_db)):
             detail=f"付款方式「{method.name}」被 {len(method.records)} 条记录使用，无法删除",
         )
 
+    user_id = method.user_id
     db.delete(method)
     db.commit()
+    SupportNameCache.invalidate(PaymentMethod, user_id)
     return {"message": "付款方式已删除"}
 
 
@@ -24,6 +24,38 @@ class Settings:
         os.getenv("SUBSCRIPTION_TOKEN_EXPIRY_HOURS", "720")
     )
 
+    # 客户端 Accept-Encoding 接受 gzip 时压缩 iCal 订阅
+    ical_feed_gzip: bool = os.getenv("ICAL_FEED_GZIP", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    # 每条记录序列化后的 VEVENT 在内存中最多缓存的条数（LRU）
+    ical_fragment_cache_size: int = int(
+        os.getenv("ICAL_FRAGMENT_CACHE_SIZE", "100000")
+    )
+    # 各订阅渲染好的快照在内存中合计最多占用的字节数（LRU）
+    ical_feed_cache_bytes: int = int(
+        os.getenv("ICAL_FEED_CACHE_BYTES", str(64 * 1024 * 1024))
+    )
+
+    # CalDAV 推送同步：定时任务间隔与每个账户的并发请求数
+    calendar_sync_interval_minutes: int = int(
+        os.getenv("CALENDAR_SYNC_INTERVAL_MINUTES", "15")
+    )
+    caldav_sync_workers: int = int(os.getenv("CALDAV_SYNC_WORKERS", "8"))
+
+    next_occurrence_refresh_minutes: int = int(
+        os.getenv("NEXT_OCCURRENCE_REFRESH_MINUTES", "5")
+    )
+
+    # 开启后每个响应带 X-Query-Count 头，记录本次请求执行的 SQL 条数
+    query_count_header: bool = os.getenv("QUERY_COUNT_HEADER", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
 
 @lru_cache()
 def get_settings() -> Settings:
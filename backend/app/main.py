@@ -1,18 +1,24 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import get_settings
 from app.database import engine
 from app.models.base import Base
 from app.api import records, support, dashboard, calendar, profile
+from app.services.scheduler import start_scheduler, shutdown_scheduler
+from app.services import query_counter, search_service
 
 settings = get_settings()
 
 Base.metadata.create_all(bind=engine)
+with engine.begin() as connection:
+    search_service.install(connection)
 
 app = FastAPI(
     title="SupCalandar API",
     description="Financial Reminder Calendar API",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -21,8 +27,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 跨域前端需要读取分页游标
+    expose_headers=["X-Next-Cursor"],
 )
 
+if settings.query_count_header:
+    query_counter.install(engine)
+
+    @app.middleware("http")
+    async def count_queries(request: Request, call_next):
+        counter = query_counter.start_counting()
+        response = await call_next(request)
+        response.headers["X-Query-Count"] = str(counter.count)
+        return response
+
+
 # Create an API router with version prefix
 from fastapi import APIRouter
 
@@ -37,6 +56,16 @@ api_router.include_router(profile.router)
 app.include_router(api_router)
 
 
+@app.on_event("startup")
+def on_startup():
+    start_scheduler()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_scheduler()
+
+
 @app.get("/")
 def root():
     return {"message": "SupCalandar API", "version": "1.0.0"}
@@ -37,3 +37,4 @@ class Direction(str, Enum):
 class CalendarProvider(str, Enum):
     ICLOUD = "icloud"
     GOOGLE = "google"
+    CALDAV = "caldav"
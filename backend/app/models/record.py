@@ -1,7 +1,19 @@
 import json
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Float, ForeignKey, JSON, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    String,
+    DateTime,
+    Float,
+    ForeignKey,
+    JSON,
+    Table,
+    Index,
+    delete,
+    event,
+    insert,
+)
+from sqlalchemy.orm import object_session, relationship
 from app.models.base import Base, RecordType, PeriodType, Direction, SQLEnum, uuid
 
 
@@ -10,6 +22,8 @@ record_categories = Table(
     Base.metadata,
     Column("record_id", String, ForeignKey("records.id"), primary_key=True),
     Column("category_id", String, ForeignKey("categories.id"), primary_key=True),
+    # 主键为 (record_id, category_id)，按分类反查记录需要反向索引
+    Index("ix_record_categories_category_id_record_id", "category_id", "record_id"),
 )
 
 
@@ -20,6 +34,11 @@ record_payment_methods = Table(
     Column(
         "payment_method_id", String, ForeignKey("payment_methods.id"), primary_key=True
     ),
+    Index(
+        "ix_record_payment_methods_payment_method_id_record_id",
+        "payment_method_id",
+        "record_id",
+    ),
 )
 
 
@@ -31,6 +50,12 @@ class BaseRecord(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # (created_at, id) 支持 keyset 分页；updated_at 供订阅缓存取 max(updated_at)
+    __table_args__ = (
+        Index("ix_records_created_at_id", "created_at", "id"),
+        Index("ix_records_updated_at", "updated_at"),
+    )
+
     __mapper_args__ = {"polymorphic_on": "type", "polymorphic_identity": "base"}
 
 
@@ -42,6 +67,13 @@ class SimpleRecord(BaseRecord):
     time = Column(DateTime, nullable=False)
     period = Column(SQLEnum(PeriodType), nullable=False)
     description = Column(String)
+    next_occurrence = Column(DateTime, index=True)
+
+    # 列表筛选：按周期 + 时间范围、仅按时间范围
+    __table_args__ = (
+        Index("ix_simple_records_period_time", "period", "time"),
+        Index("ix_simple_records_time", "time"),
+    )
 
     __mapper_args__ = {"polymorphic_identity": RecordType.SIMPLE}
 
@@ -60,6 +92,9 @@ class PaymentRecord(BaseRecord):
     end_time = Column(DateTime)
     notes = Column(String)
     currency = Column(String(3), default="CNY")
+    next_occurrence = Column(DateTime, index=True)
+    # 按周期折算的年化金额，由 before_insert / before_update 维护
+    annualized_amount = Column(Float, index=True)
 
     categories = relationship(
         "Category", secondary=record_categories, back_populates="records"
@@ -68,9 +103,37 @@ class PaymentRecord(BaseRecord):
         "PaymentMethod", secondary=record_payment_methods, back_populates="records"
     )
 
+    # 列表筛选：方向 + 周期 + 金额范围、币种 + 金额范围、开始时间范围
+    __table_args__ = (
+        Index(
+            "ix_payment_records_direction_period_amount",
+            "direction",
+            "period",
+            "amount",
+        ),
+        Index("ix_payment_records_currency_amount", "currency", "amount"),
+        Index("ix_payment_records_start_time", "start_time"),
+    )
+
     __mapper_args__ = {"polymorphic_identity": RecordType.PAYMENT}
 
 
+@event.listens_for(BaseRecord, "before_update", propagate=True)
+def _touch_updated_at(mapper, connection, target: BaseRecord) -> None:
+    # onupdate 只在 records 表本身有 UPDATE 时生效；只改子表列或分类时也要刷新
+    session = object_session(target)
+    if session is not None and session.is_modified(target):
+        target.updated_at = datetime.utcnow()
+
+
+@event.listens_for(PaymentRecord, "before_insert")
+@event.listens_for(PaymentRecord, "before_update")
+def _maintain_annualized_amount(mapper, connection, target: PaymentRecord) -> None:
+    from app.services.period_calculator import annualize
+
+    target.annualized_amount = annualize(target.amount, target.period)
+
+
 class CustomRecord(BaseRecord):
     __tablename__ = "custom_records"
 
@@ -79,3 +142,22 @@ class CustomRecord(BaseRecord):
     custom_fields = Column(JSON, nullable=False)
 
     __mapper_args__ = {"polymorphic_identity": RecordType.CUSTOM}
+
+
+class RecordTombstone(Base):
+    """已删除记录的 id 与删除时间，增量同步据此只处理上次同步以来删除的记录"""
+
+    __tablename__ = "record_tombstones"
+
+    record_id = Column(String, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+@event.listens_for(BaseRecord, "after_delete", propagate=True)
+def _write_tombstone(mapper, connection, target: BaseRecord) -> None:
+    # 所有记录删除都经由 ORM；同一 id 再次删除（如导入后又删除）时刷新删除时间
+    tombstones = RecordTombstone.__table__
+    connection.execute(delete(tombstones).where(tombstones.c.record_id == target.id))
+    connection.execute(
+        insert(tombstones).values(record_id=target.id, deleted_at=datetime.utcnow())
+    )
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String
+from datetime import datetime
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, String
 from sqlalchemy.orm import relationship
-from app.models.base import Base, SQLEnum, uuid
+from app.models.base import Base, CalendarProvider, SQLEnum, uuid
 
 
 class Category(Base):
@@ -8,7 +9,7 @@ class Category(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, default="default", nullable=False)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
 
     records = relationship(
         "PaymentRecord", secondary="record_categories", back_populates="categories"
@@ -20,7 +21,7 @@ class PaymentMethod(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, default="default", nullable=False)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
 
     records = relationship(
         "PaymentRecord",
@@ -33,11 +34,46 @@ class CalendarSync(Base):
     __tablename__ = "calendar_syncs"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    provider = Column(SQLEnum, nullable=False)
+    provider = Column(SQLEnum(CalendarProvider), nullable=False)
     account_id = Column(String, nullable=False)
-    enabled = Column(String, default=False)
-    last_sync_at = Column(String)
+    enabled = Column(Boolean, default=False)
+    # 上一次完整成功推送的开始时间，下一次只推送此后变化的记录
+    last_sync_at = Column(DateTime)
+    # 认证信息：{"username": ..., "password": ...} 的 JSON 经 Fernet 加密
+    # （密钥由 SECRET_KEY 派生，见 CalDAVSyncService.seal_credentials）
     auth_data = Column(String)
+    # 推送目标的 CalDAV 日历集合 URL
+    calendar_url = Column(String)
+
+
+class CalendarSyncItem(Base):
+    """记录在远端日历上对应的资源：href 与最近一次推送返回的 ETag"""
+
+    __tablename__ = "calendar_sync_items"
+
+    sync_id = Column(
+        String, ForeignKey("calendar_syncs.id", ondelete="CASCADE"), primary_key=True
+    )
+    # 不设外键：记录删除后仍要凭此删除远端资源
+    record_id = Column(String, primary_key=True)
+    href = Column(String, nullable=False)
+    etag = Column(String)
+    # 推送时记录的 updated_at，相同则无需再次推送
+    record_updated_at = Column(DateTime)
+
+
+class SubscriptionToken(Base):
+    """iCal 订阅令牌：订阅内容限定为 user_id 的记录，并按 filters 进一步筛选"""
+
+    __tablename__ = "subscription_tokens"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    token = Column(String, nullable=False, unique=True, index=True)
+    user_id = Column(String, default="default", nullable=False, index=True)
+    # SubscriptionFilters 的 JSON，空表示不筛选
+    filters = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
 
 
 class CustomFieldTemplate(Base):
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import Annotated, Literal
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from app.models.base import RecordType, PeriodType, Direction
 
@@ -45,6 +46,46 @@ class PaymentRecordUpdate(BaseModel):
     currency: str = "CNY"
 
 
+class SimpleRecordBatchCreate(SimpleRecordCreate):
+    type: Literal["simple"]
+
+
+class PaymentRecordBatchCreate(PaymentRecordCreate):
+    type: Literal["payment"]
+
+
+class SimpleRecordBatchUpdate(SimpleRecordUpdate):
+    type: Literal["simple"]
+    id: str
+
+
+class PaymentRecordBatchUpdate(PaymentRecordUpdate):
+    type: Literal["payment"]
+    id: str
+
+
+class RecordBatchCreate(BaseModel):
+    records: list[
+        Annotated[
+            SimpleRecordBatchCreate | PaymentRecordBatchCreate,
+            Field(discriminator="type"),
+        ]
+    ]
+
+
+class RecordBatchUpdate(BaseModel):
+    records: list[
+        Annotated[
+            SimpleRecordBatchUpdate | PaymentRecordBatchUpdate,
+            Field(discriminator="type"),
+        ]
+    ]
+
+
+class RecordBatchDelete(BaseModel):
+    ids: list[str]
+
+
 class CustomRecordCreate(BaseModel):
     template_id: str
     custom_fields: dict
@@ -56,8 +97,7 @@ class RecordResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SimpleRecordResponse(RecordResponse):
@@ -83,52 +123,3 @@ class PaymentRecordResponse(RecordResponse):
     notes: str | None
     currency: str
     next_occurrence: datetime | None
-
-    class Config:
-        orm_mode = True
-
-    @classmethod
-    def from_orm(cls, obj):
-        import json
-
-        data = {
-            "id": obj.id,
-            "type": obj.type,
-            "created_at": obj.created_at,
-            "updated_at": obj.updated_at,
-            "name": obj.name,
-            "description": obj.description,
-            "direction": obj.direction,
-            "amount": obj.amount,
-            "period": obj.period,
-            "start_time": obj.start_time,
-            "end_time": obj.end_time,
-            "notes": obj.notes,
-            "currency": obj.currency,
-            "next_occurrence": obj.next_occurrence,
-        }
-        if obj.category:
-            try:
-                data["category"] = (
-                    json.loads(obj.category)
-                    if isinstance(obj.category, str)
-                    else obj.category
-                )
-            except:
-                data["category"] = [obj.category]
-        else:
-            data["category"] = None
-
-        if obj.payment_method:
-            try:
-                data["payment_method"] = (
-                    json.loads(obj.payment_method)
-                    if isinstance(obj.payment_method, str)
-                    else obj.payment_method
-                )
-            except:
-                data["payment_method"] = [obj.payment_method]
-        else:
-            data["payment_method"] = None
-
-        return cls(**data)
@@ -1,4 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
+from app.models.base import CalendarProvider, RecordType, PeriodType, Direction
 
 
 class CategoryCreate(BaseModel):
@@ -35,3 +37,56 @@ class PaymentMethodResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SubscriptionFilters(BaseModel):
+    """订阅筛选条件，含义与 GET /records 的同名参数相同"""
+
+    type: RecordType | None = None
+    direction: Direction | None = None
+    period: PeriodType | None = None
+    category: list[str] | None = None
+    payment_method: list[str] | None = None
+    currency: str | None = None
+
+
+class SubscriptionCreate(SubscriptionFilters):
+    user_id: str = "default"
+
+
+class SubscriptionResponse(BaseModel):
+    token: str
+    user_id: str
+    filters: SubscriptionFilters
+    expires_at: datetime
+    webcal_url: str
+    http_url: str
+    google_url: str
+
+
+class CalendarSyncCreate(BaseModel):
+    provider: CalendarProvider
+    account_id: str
+    calendar_url: str
+    username: str | None = None
+    password: str | None = None
+    enabled: bool = True
+
+
+class CalendarSyncResponse(BaseModel):
+    id: str
+    provider: CalendarProvider
+    account_id: str
+    calendar_url: str | None = None
+    enabled: bool | None = None
+    last_sync_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class CalendarSyncResult(BaseModel):
+    uploaded: int
+    deleted: int
+    failed: int
+    errors: list[str]
@@ -0,0 +1,338 @@
+import base64
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from cryptography.fernet import Fernet, InvalidToken
+from requests.adapters import HTTPAdapter
+from sqlalchemy import and_, delete, exists, func, insert, select
+from sqlalchemy.orm import Session
+from urllib3.util.retry import Retry
+from app.config import get_settings
+from app.models.base import CalendarProvider
+from app.models.record import BaseRecord, RecordTombstone
+from app.models.support import CalendarSync, CalendarSyncItem
+from app.services.ical_service import ICalService
+
+# 支持 CalDAV 推送的账户类型（Google 日历需走其 API，不在此处理）
+CALDAV_PROVIDERS = (CalendarProvider.ICLOUD, CalendarProvider.CALDAV)
+
+# 按 updated_at 取变化记录时向前多看的时间：覆盖上次同步开始前写入、
+# 但在其查询之后才提交的记录；已推送过的由 record_updated_at 比较排除
+SYNC_OVERLAP = timedelta(minutes=5)
+# 每批渲染 / 推送的记录数
+SYNC_BATCH_SIZE = 500
+
+_records = BaseRecord.__table__
+_items = CalendarSyncItem.__table__
+_tombstones = RecordTombstone.__table__
+_syncs = CalendarSync.__table__
+
+
+def _fernet() -> Fernet:
+    # 由 SECRET_KEY 派生加密密钥；更换 SECRET_KEY 后需要重新添加账户
+    key = hashlib.sha256(get_settings().secret_key.encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+class CalDAVSyncError(Exception):
+    pass
+
+
+@dataclass
+class _Operation:
+    method: str
+    record_id: str
+    href: str
+    etag: str | None = None
+    record_updated_at: datetime | None = None
+    body: bytes | None = None
+    # 远端尚无该资源（首次推送）
+    created: bool = False
+    # 执行结果
+    ok: bool = False
+    new_etag: str | None = None
+    error: str | None = None
+
+
+class CalDAVSyncService:
+    """
+    把记录增量推送到 CalDAV 日历（每条记录一个 .ics 资源）
+
+    每个账户在 calendar_sync_items 中记录各记录的远端 href 与 ETag。
+    每次只推送 last_sync_at 以来变化的记录（PUT）以及 record_tombstones 中
+    此后删除的记录（DELETE），
+    请求复用连接并发执行，网络错误与 5xx / 429 自动重试；
+    一次同步的开销与变化数成正比，而不是重新上传整个日历。
+    """
+
+    @staticmethod
+    def seal_credentials(username: str | None, password: str | None) -> str:
+        """加密认证信息，结果存入 CalendarSync.auth_data，数据库中不保存明文密码"""
+        payload = json.dumps({"username": username, "password": password})
+        return _fernet().encrypt(payload.encode()).decode()
+
+    @staticmethod
+    def credentials(sync: CalendarSync) -> dict:
+        if not sync.auth_data:
+            return {}
+        try:
+            return json.loads(_fernet().decrypt(sync.auth_data.encode()))
+        except InvalidToken:
+            raise CalDAVSyncError("认证信息无法解密（SECRET_KEY 已更换？），请重新添加账户")
+
+    @staticmethod
+    def client(sync: CalendarSync):
+        """按账户的 calendar_url 与认证信息创建 CalDAV 客户端"""
+        import caldav
+
+        if not sync.calendar_url:
+            raise CalDAVSyncError("未配置 CalDAV 日历地址")
+        auth = CalDAVSyncService.credentials(sync)
+        client = caldav.DAVClient(
+            url=sync.calendar_url,
+            username=auth.get("username"),
+            password=auth.get("password"),
+            timeout=30,
+        )
+        workers = get_settings().caldav_sync_workers
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"PUT", "DELETE"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry, pool_connections=1, pool_maxsize=workers
+        )
+        client.session.mount("http://", adapter)
+        client.session.mount("https://", adapter)
+        return client
+
+    @staticmethod
+    def push(db: Session, sync: CalendarSync, client=None) -> dict:
+        """
+        执行一次增量推送，返回各类操作的数量
+
+        client 需提供 request(url, method, body, headers) 并返回带 status / headers
+        的响应（caldav.DAVClient 即可），测试时可替换为本地 Radicale 或进程内替身。
+        全部成功时才推进 last_sync_at；有失败时下次从原位置重试，
+        已成功推送的记录由 record_updated_at 比较跳过。
+        """
+        if sync.provider not in CALDAV_PROVIDERS:
+            raise CalDAVSyncError(f"{sync.provider.value} 不支持 CalDAV 推送")
+        if client is None:
+            client = CalDAVSyncService.client(sync)
+
+        started = datetime.utcnow()
+        result = {"uploaded": 0, "deleted": 0, "failed": 0, "errors": []}
+
+        for operations in CalDAVSyncService._operations(db, sync):
+            CalDAVSyncService._execute(client, operations)
+            CalDAVSyncService._apply(db, sync, operations, result)
+            db.commit()
+
+        if not result["failed"]:
+            sync.last_sync_at = started
+            db.commit()
+        return result
+
+    @staticmethod
+    def _operations(db: Session, sync: CalendarSync):
+        """按批生成待执行的 PUT / DELETE"""
+        # 各批之间会提交，先取出用到的字段，避免每次访问都重新加载 sync
+        sync_id, last_sync_at = sync.id, sync.last_sync_at
+        base_url = sync.calendar_url.rstrip("/") + "/"
+
+        changed = (
+            select(
+                _records.c.id,
+                _records.c.updated_at,
+                _items.c.href,
+                _items.c.etag,
+                _items.c.record_updated_at,
+            )
+            .select_from(
+                _records.outerjoin(
+                    _items,
+                    and_(
+                        _items.c.record_id == _records.c.id,
+                        _items.c.sync_id == sync_id,
+                    ),
+                )
+            )
+            .order_by(_records.c.updated_at, _records.c.id)
+        )
+        if last_sync_at is not None:
+            # 走 updated_at 索引，只扫描变化的记录
+            changed = changed.where(
+                _records.c.updated_at > last_sync_at - SYNC_OVERLAP
+            )
+
+        pending = [
+            row
+            for row in db.execute(changed)
+            if row.href is None or row.record_updated_at != row.updated_at
+        ]
+        for offset in range(0, len(pending), SYNC_BATCH_SIZE):
+            batch = pending[offset : offset + SYNC_BATCH_SIZE]
+            fragments = ICalService.event_fragments(
+                db, [(row.id, row.updated_at) for row in batch]
+            )
+            yield [
+                _Operation(
+                    method="PUT",
+                    record_id=row.id,
+                    href=row.href or f"{base_url}{row.id}.ics",
+                    etag=row.etag,
+                    record_updated_at=row.updated_at,
+                    body=ICalService.event_resource(fragments[row.id]),
+                    created=row.href is None,
+                )
+                for row in batch
+                if row.id in fragments
+            ]
+
+        # 按 deleted_at 索引取上次同步以来的删除，再按主键找到本账户推送过的资源；
+        # 删除后又以相同 id 导入的记录仍然存在，不删除远端资源
+        deleted = (
+            select(_items.c.record_id, _items.c.href, _items.c.etag)
+            .select_from(
+                _tombstones.join(
+                    _items,
+                    and_(
+                        _items.c.record_id == _tombstones.c.record_id,
+                        _items.c.sync_id == sync_id,
+                    ),
+                )
+            )
+            .where(~exists().where(_records.c.id == _tombstones.c.record_id))
+        )
+        if last_sync_at is not None:
+            deleted = deleted.where(
+                _tombstones.c.deleted_at > last_sync_at - SYNC_OVERLAP
+            )
+        deleted = db.execute(deleted).all()
+        for offset in range(0, len(deleted), SYNC_BATCH_SIZE):
+            yield [
+                _Operation(method="DELETE", record_id=record_id, href=href, etag=etag)
+                for record_id, href, etag in deleted[offset : offset + SYNC_BATCH_SIZE]
+            ]
+
+    @staticmethod
+    def prune_tombstones(db: Session) -> int:
+        """
+        清理所有账户都已处理过的删除记录，返回清理的条数
+
+        尚未成功同步过、但已推送过记录的账户需要全部删除记录，此时不清理；
+        没有任何账户时全部清理。
+        """
+        never_synced = db.execute(
+            select(_syncs.c.id)
+            .where(
+                _syncs.c.last_sync_at.is_(None),
+                exists().where(_items.c.sync_id == _syncs.c.id),
+            )
+            .limit(1)
+        ).first()
+        if never_synced is not None:
+            return 0
+
+        oldest = db.execute(select(func.min(_syncs.c.last_sync_at))).scalar()
+        query = delete(_tombstones)
+        if oldest is not None:
+            query = query.where(_tombstones.c.deleted_at < oldest - SYNC_OVERLAP)
+        count = db.execute(query).rowcount
+        db.commit()
+        return count
+
+    @staticmethod
+    def _execute(client, operations: list[_Operation]) -> None:
+        if not operations:
+            return
+        # 第一个请求单独发送，完成认证协商与建立连接后再并发
+        CalDAVSyncService._send(client, operations[0])
+        workers = get_settings().caldav_sync_workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(
+                executor.map(
+                    lambda operation: CalDAVSyncService._send(client, operation),
+                    operations[1:],
+                )
+            )
+
+    @staticmethod
+    def _send(client, operation: _Operation) -> None:
+        if operation.method == "PUT":
+            headers = {"Content-Type": "text/calendar; charset=utf-8"}
+            # 新资源不覆盖远端同名资源；已有资源只在远端未被改动时覆盖
+            if operation.etag:
+                headers["If-Match"] = operation.etag
+            elif operation.created:
+                headers["If-None-Match"] = "*"
+        else:
+            headers = {"If-Match": operation.etag} if operation.etag else {}
+
+        try:
+            response = client.request(
+                operation.href, operation.method, operation.body or "", headers
+            )
+            if response.status == 412:
+                # 远端资源已变化：本地记录为准，无条件覆盖 / 删除
+                headers.pop("If-Match", None)
+                headers.pop("If-None-Match", None)
+                response = client.request(
+                    operation.href, operation.method, operation.body or "", headers
+                )
+        except Exception as e:
+            operation.error = f"{operation.method} {operation.href}: {e}"
+            return
+
+        if 200 <= response.status < 300 or (
+            operation.method == "DELETE" and response.status in (404, 410)
+        ):
+            operation.ok = True
+            operation.new_etag = response.headers.get("ETag")
+        else:
+            operation.error = (
+                f"{operation.method} {operation.href}: HTTP {response.status}"
+            )
+
+    @staticmethod
+    def _apply(
+        db: Session, sync: CalendarSync, operations: list[_Operation], result: dict
+    ) -> None:
+        """把执行结果写回 calendar_sync_items：每批一条 DELETE 加一条批量 INSERT"""
+        succeeded = []
+        for operation in operations:
+            if operation.ok:
+                succeeded.append(operation)
+                result["uploaded" if operation.method == "PUT" else "deleted"] += 1
+            else:
+                result["failed"] += 1
+                if len(result["errors"]) < 10:
+                    result["errors"].append(operation.error)
+        if not succeeded:
+            return
+
+        db.execute(
+            delete(_items).where(
+                _items.c.sync_id == sync.id,
+                _items.c.record_id.in_([op.record_id for op in succeeded]),
+            )
+        )
+        uploaded = [
+            {
+                "sync_id": sync.id,
+                "record_id": op.record_id,
+                "href": op.href,
+                "etag": op.new_etag,
+                "record_updated_at": op.record_updated_at,
+            }
+            for op in succeeded
+            if op.method == "PUT"
+        ]
+        if uploaded:
+            db.execute(insert(_items), uploaded)
@@ -0,0 +1,228 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Iterator
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.record import BaseRecord
+from app.services.record_serializer import RECORD_ROWS
+
+# 流式输出时攒够这么多字节再发送一次，避免每个 VEVENT 一次线程池切换
+STREAM_CHUNK_SIZE = 64 * 1024
+# 渲染结果不超过该大小时保留在内存中供后续请求直接返回；更大的订阅每次流式生成
+MAX_CACHED_BYTES = 8 * 1024 * 1024
+
+_records = BaseRecord.__table__
+
+
+def _data_version(db: Session, conditions: list) -> tuple:
+    """(记录数, max(updated_at))；无条件时只查 records 表，由 updated_at 索引得出"""
+    columns = (func.count(), func.max(_records.c.updated_at))
+    if not conditions:
+        query = select(*columns)
+    else:
+        query = RECORD_ROWS.with_only_columns(*columns).where(*conditions)
+    return tuple(db.execute(query).one())
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Accept-Encoding 是否接受 gzip（忽略 q=0 的项）"""
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        return True
+    return False
+
+
+@dataclass(frozen=True)
+class FeedVersion:
+    """
+    某一数据版本下订阅内容的校验信息
+
+    ETag 由缓存键、数据版本与内容编码得出，不需要先生成内容：
+    同一版本渲染出的字节完全相同，因此可以作为强 ETag，并在流式输出前就发出。
+    """
+
+    key: str
+    version: tuple
+    encoding: str
+
+    @property
+    def etag(self) -> str:
+        count, last_updated = self.version
+        stamp = last_updated.isoformat() if last_updated is not None else ""
+        digest = hashlib.sha256(
+            f"{self.key}:{count}:{stamp}:{self.encoding}".encode()
+        ).hexdigest()
+        return f'"{digest[:32]}"'
+
+    @property
+    def last_modified(self) -> datetime | None:
+        last_updated = self.version[1]
+        if last_updated is None:
+            return None
+        return last_updated.replace(tzinfo=timezone.utc)
+
+    @property
+    def last_modified_header(self) -> str | None:
+        if self.last_modified is None:
+            return None
+        return format_datetime(self.last_modified, usegmt=True)
+
+    def not_modified(
+        self, if_none_match: str | None, if_modified_since: str | None
+    ) -> bool:
+        """
+        条件请求判断（RFC 9110）：有 If-None-Match 时只比较 ETag，
+        否则比较 If-Modified-Since 与 Last-Modified（秒级精度）
+        """
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return self.last_modified.replace(microsecond=0) <= since
+
+
+class FeedCache:
+    """
+    进程内按订阅缓存渲染好的 iCal 内容（快照）
+
+    以数据版本 (记录数, max(updated_at)) 为键：记录的新增 / 修改会推进
+    max(updated_at)，删除会改变记录数；分类 / 付款方式改名时 /support 会同步刷新
+    关联记录的 updated_at。版本由数据库得出，多进程部署下各进程的缓存也能各自正确失效。
+
+    带筛选条件的订阅先比较全表版本（records 表索引上的一条聚合查询）：
+    全表未变化时沿用上次算出的筛选范围版本，变化后才按条件重新统计，
+    因此大量订阅轮询时每次请求只需一条索引查询。快照总大小受
+    ICAL_FEED_CACHE_BYTES 限制，超出时淘汰最久未使用的快照。
+    """
+
+    _lock = threading.Lock()
+    _scoped: dict[str, tuple[tuple, tuple]] = {}
+    _bodies: "OrderedDict[tuple[str, str], tuple[tuple, bytes]]" = OrderedDict()
+    _bodies_size = 0
+
+    @classmethod
+    def version(
+        cls,
+        db: Session,
+        key: str,
+        encoding: str = "identity",
+        conditions: list | None = None,
+    ) -> FeedVersion:
+        global_version = _data_version(db, [])
+        if not conditions:
+            return FeedVersion(key, global_version, encoding)
+
+        with cls._lock:
+            cached = cls._scoped.get(key)
+        if cached is not None and cached[0] == global_version:
+            return FeedVersion(key, cached[1], encoding)
+
+        # 先取全表版本再统计筛选范围：并发写入时范围版本只会更新、不会更旧
+        scoped_version = _data_version(db, conditions)
+        with cls._lock:
+            cls._scoped[key] = (global_version, scoped_version)
+        return FeedVersion(key, scoped_version, encoding)
+
+    @classmethod
+    def body(cls, feed: FeedVersion) -> bytes | None:
+        """返回该版本已缓存的内容（按编码分别缓存）；没有或已过期时返回 None"""
+        with cls._lock:
+            cached = cls._bodies.get((feed.key, feed.encoding))
+            if cached is None or cached[0] != feed.version:
+                return None
+            cls._bodies.move_to_end((feed.key, feed.encoding))
+            return cached[1]
+
+    @classmethod
+    def stream(cls, feed: FeedVersion, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        把渲染出的字节片段合并成较大的块输出，按需 gzip 压缩
+
+        输出的同时保留一份副本，完整输出且不超过 MAX_CACHED_BYTES 时写入缓存；
+        客户端中途断开时不缓存不完整的内容。
+        """
+        compressor = (
+            zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+            if feed.encoding == "gzip"
+            else None
+        )
+        kept: list[bytes] | None = []
+        kept_size = 0
+        buffer: list[bytes] = []
+        buffered = 0
+
+        def emit(data: bytes):
+            nonlocal kept, kept_size
+            if kept is not None:
+                kept_size += len(data)
+                if kept_size > MAX_CACHED_BYTES:
+                    kept = None
+                else:
+                    kept.append(data)
+            return data
+
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= STREAM_CHUNK_SIZE:
+                data = b"".join(buffer)
+                buffer, buffered = [], 0
+                if compressor is not None:
+                    data = compressor.compress(data)
+                if data:
+                    yield emit(data)
+
+        data = b"".join(buffer)
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.flush()
+        if data:
+            yield emit(data)
+
+        if kept is not None:
+            cls._store(feed, b"".join(kept))
+
+    @classmethod
+    def _store(cls, feed: FeedVersion, body: bytes) -> None:
+        max_total = get_settings().ical_feed_cache_bytes
+        cache_key = (feed.key, feed.encoding)
+        with cls._lock:
+            previous = cls._bodies.pop(cache_key, None)
+            if previous is not None:
+                cls._bodies_size -= len(previous[1])
+            cls._bodies[cache_key] = (feed.version, body)
+            cls._bodies_size += len(body)
+            while cls._bodies_size > max_total and cls._bodies:
+                _, (_, evicted) = cls._bodies.popitem(last=False)
+                cls._bodies_size -= len(evicted)
+
+    @classmethod
+    def invalidate(cls, key: str | None = None) -> None:
+        with cls._lock:
+            for cache_key in list(cls._bodies):
+                if key is None or cache_key[0] == key:
+                    cls._bodies_size -= len(cls._bodies.pop(cache_key)[1])
+            for scope_key in list(cls._scoped):
+                if key is None or scope_key == key:
+                    del cls._scoped[scope_key]
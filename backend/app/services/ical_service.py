@@ -1,48 +1,196 @@
 from icalendar import Calendar, Event
 from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import Iterable, Iterator
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload, with_polymorphic
 from app.models.record import BaseRecord, SimpleRecord, PaymentRecord
-from app.models.base import Direction
+from app.models.base import Direction, PeriodType
 import pytz
 
+# 周期 → RRULE 的 FREQ / INTERVAL
+PERIOD_RRULES = {
+    PeriodType.WEEK: {"freq": "weekly"},
+    PeriodType.MONTH: {"freq": "monthly"},
+    PeriodType.QUARTER: {"freq": "monthly", "interval": 3},
+    PeriodType.HALF_YEAR: {"freq": "monthly", "interval": 6},
+    PeriodType.YEAR: {"freq": "yearly"},
+}
+
+
+# 日历固定的结尾行；流式输出时先输出其余部分，最后补上
+_CALENDAR_END = b"END:VCALENDAR\r\n"
+
+_TZ = pytz.timezone("Asia/Shanghai")
+
 
 class ICalService:
     @staticmethod
-    def generate_subscription_ical(records: list[BaseRecord]) -> str:
+    def generate_subscription_ical(records: Iterable[BaseRecord]) -> str:
+        return b"".join(ICalService.stream_subscription_ical(records)).decode("utf-8")
+
+    @staticmethod
+    def stream_subscription_ical(records: Iterable[BaseRecord]) -> Iterator[bytes]:
+        """
+        逐条输出日历内容的字节片段：日历头、每条记录一个 VEVENT、日历尾
+
+        不构造整棵 Calendar 对象树，内存占用与记录数无关；
+        records 可以是 yield_per 游标，边读边输出。
+        """
+        yield ICalService._calendar_header()
+        for record in records:
+            yield ICalService._event_ical(record)
+        yield _CALENDAR_END
+
+    @staticmethod
+    def stream_feed(
+        db: Session, batch_size: int = 500, conditions: list | None = None
+    ) -> Iterator[bytes]:
+        """
+        按 (created_at, id) 顺序输出订阅日历，VEVENT 片段取自 VEventCache
+
+        conditions 为作用于 RECORD_ROWS 连接的筛选条件（见 SubscriptionService）。
+
+        先用一条只取 (id, updated_at) 的游标按批遍历记录，每批只为缓存未命中
+        （新建或 updated_at 已变化）的记录加载 ORM 对象并重新序列化，
+        单条记录修改后重新生成订阅的开销与修改数成正比，而不是与记录数成正比。
+        """
+        from app.services.record_serializer import RECORD_ROWS
+
+        records = BaseRecord.__table__
+        result = db.execute(
+            RECORD_ROWS.with_only_columns(records.c.id, records.c.updated_at)
+            .where(*(conditions or []))
+            .order_by(records.c.created_at, records.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        yield ICalService._calendar_header()
+        for batch in result.partitions():
+            fragments = ICalService.event_fragments(db, batch)
+            # 遍历期间被删除的记录没有片段，直接跳过
+            chunk = b"".join(
+                fragments[record_id] for record_id, _ in batch if record_id in fragments
+            )
+            if chunk:
+                yield chunk
+        yield _CALENDAR_END
+
+    @staticmethod
+    def event_fragments(
+        db: Session, keys: list[tuple[str, datetime | None]]
+    ) -> dict[str, bytes]:
+        """
+        按 (record_id, updated_at) 取各记录序列化好的 VEVENT 片段
+
+        命中 VEventCache 的直接返回，其余一次性加载 ORM 对象重新序列化并写入缓存；
+        已被删除的记录不在结果中。
+        """
+        from app.services.vevent_cache import VEventCache
+
+        fragments = VEventCache.get_many(keys)
+        missing = [record_id for record_id, _ in keys if record_id not in fragments]
+        if not missing:
+            return fragments
+
+        feed_records = with_polymorphic(BaseRecord, [SimpleRecord, PaymentRecord])
+        loaded, rendered = [], []
+        for record in db.scalars(
+            select(feed_records)
+            .where(feed_records.id.in_(missing))
+            .options(
+                selectinload(feed_records.PaymentRecord.categories),
+                selectinload(feed_records.PaymentRecord.payment_methods),
+            )
+        ):
+            loaded.append(record)
+            fragment = ICalService._event_ical(record)
+            fragments[record.id] = fragment
+            rendered.append((record.id, record.updated_at, fragment))
+        VEventCache.put_many(rendered)
+        # 只释放本次加载的记录，调用方会话中的其他对象（如 CalendarSync）不受影响
+        for record in loaded:
+            db.expunge(record)
+        return fragments
+
+    @staticmethod
+    def event_resource(fragment: bytes) -> bytes:
+        """把单个 VEVENT 片段包装为完整的日历对象（CalDAV 每个资源一个事件）"""
+        cal = Calendar()
+        cal.add("prodid", "-//SupCal//Calendar//CN")
+        cal.add("version", "2.0")
+        return cal.to_ical()[: -len(_CALENDAR_END)] + fragment + _CALENDAR_END
+
+    @staticmethod
+    def _calendar_header() -> bytes:
         cal = Calendar()
         cal.add("prodid", "-//SupCal//Calendar//CN")
         cal.add("version", "2.0")
         cal.add("X-WR-CALNAME", "财务提醒日历")
         cal.add("X-WR-TIMEZONE", "Asia/Shanghai")
         cal.add("X-WR-CALDESC", "收付款记录与提醒")
+        return cal.to_ical()[: -len(_CALENDAR_END)]
 
-        tz = pytz.timezone("Asia/Shanghai")
+    @staticmethod
+    def _event_ical(record: BaseRecord) -> bytes:
+        return ICalService._event(record, _TZ).to_ical()
 
-        for record in records:
-            event = Event()
-            event.add("uid", record.id)
-            event.add("summary", ICalService._format_summary(record))
-
-            if isinstance(record, SimpleRecord):
-                dt = record.time
-                if dt.tzinfo is None:
-                    dt = tz.localize(dt)
-                event.add("dtstart", dt)
-                event.add("dtend", dt)
-            elif isinstance(record, PaymentRecord):
-                dt = record.start_time
-                if dt.tzinfo is None:
-                    dt = tz.localize(dt)
-                event.add("dtstart", dt)
-                end_dt = record.end_time or record.start_time
-                if end_dt.tzinfo is None:
-                    end_dt = tz.localize(end_dt)
-                event.add("dtend", end_dt)
-
-            event.add("description", ICalService._format_description(record))
-            cal.add_component(event)
-
-        return cal.to_ical().decode("utf-8")
+    @staticmethod
+    def _event(record: BaseRecord, tz) -> Event:
+        event = Event()
+        event.add("uid", record.id)
+        event.add("summary", ICalService._format_summary(record))
+
+        if record.updated_at:
+            event.add("dtstamp", pytz.utc.localize(record.updated_at))
+
+        # 每条记录一个 VEVENT，重复由 RRULE 表达，不展开各次发生
+        if isinstance(record, SimpleRecord):
+            dt = record.time
+            if dt.tzinfo is None:
+                dt = tz.localize(dt)
+            event.add("dtstart", dt)
+            event.add("dtend", dt)
+            event.add("rrule", ICalService._recurrence(record.time, record.period))
+        elif isinstance(record, PaymentRecord):
+            dt = record.start_time
+            if dt.tzinfo is None:
+                dt = tz.localize(dt)
+            event.add("dtstart", dt)
+            event.add("dtend", dt)
+            until = None
+            if record.end_time:
+                until = record.end_time
+                if until.tzinfo is None:
+                    until = tz.localize(until)
+            event.add(
+                "rrule",
+                ICalService._recurrence(record.start_time, record.period, until),
+            )
+
+        event.add("description", ICalService._format_description(record))
+        return event
+
+    @staticmethod
+    def _recurrence(
+        start: datetime, period: PeriodType, until: datetime | None = None
+    ) -> dict:
+        """
+        把周期转换为 RRULE
+
+        按月 / 年重复且开始日在 29 日及以后时，本系统在短月取月末
+        （1 月 31 日 → 2 月 28/29 日），而 RFC 5545 会跳过没有该日期的月份；
+        用 BYMONTHDAY=28..d 加 BYSETPOS=-1 取其中存在的最后一天，与之保持一致。
+        UNTIL 按 RFC 要求转换为 UTC。
+        """
+        rule = dict(PERIOD_RRULES[period])
+        if period != PeriodType.WEEK and start.day > 28:
+            rule["bymonthday"] = list(range(28, start.day + 1))
+            rule["bysetpos"] = -1
+            if period == PeriodType.YEAR:
+                rule["bymonth"] = start.month
+        if until is not None:
+            rule["until"] = until.astimezone(pytz.utc)
+        return rule
 
     @staticmethod
     def _format_summary(record: BaseRecord) -> str:
@@ -60,8 +208,14 @@ class ICalService:
             desc_parts.append(
                 f"方向: {'收入' if record.direction == Direction.INCOME else '支出'}"
             )
-            desc_parts.append(f"分类: {record.category}")
-            desc_parts.append(f"付款方式: {record.payment_method}")
+            if record.categories:
+                desc_parts.append(
+                    f"分类: {', '.join(c.name for c in record.categories)}"
+                )
+            if record.payment_methods:
+                desc_parts.append(
+                    f"付款方式: {', '.join(pm.name for pm in record.payment_methods)}"
+                )
             if record.notes:
                 desc_parts.append(f"备注: {record.notes}")
         elif isinstance(record, SimpleRecord):
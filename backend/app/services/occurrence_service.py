@@ -0,0 +1,63 @@
+from datetime import datetime
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+from app.models.record import SimpleRecord, PaymentRecord
+from app.services.period_calculator import (
+    calculate_next_occurrence_from_now,
+    calculate_next_occurrences_batch,
+)
+
+
+class OccurrenceService:
+    """维护 simple_records / payment_records 上持久化的 next_occurrence 列"""
+
+    @staticmethod
+    def refresh(record: SimpleRecord | PaymentRecord, now: datetime) -> None:
+        """在创建 / 更新记录时重新计算 next_occurrence（随同一事务提交）"""
+        start = record.time if isinstance(record, SimpleRecord) else record.start_time
+        record.next_occurrence = calculate_next_occurrence_from_now(
+            now, record.period, start
+        )
+
+    @staticmethod
+    def roll_forward(db: Session, now: datetime) -> int:
+        """
+        把已过期（< now）或尚未计算（NULL）的 next_occurrence 推进到下一个周期
+
+        只读取需要推进的行的 id / 开始时间 / 周期，批量计算后直接更新子表，
+        不会改动 records.updated_at。返回更新的行数。
+        """
+        updated = 0
+        for model, start_column in (
+            (SimpleRecord, SimpleRecord.time),
+            (PaymentRecord, PaymentRecord.start_time),
+        ):
+            rows = (
+                db.query(model.record_id, start_column, model.period)
+                .filter(
+                    or_(model.next_occurrence.is_(None), model.next_occurrence < now)
+                )
+                .all()
+            )
+            if not rows:
+                continue
+
+            record_ids, starts, periods = zip(*rows)
+            next_occurrences = calculate_next_occurrences_batch(
+                starts, periods, now
+            ).tolist()
+
+            table = model.__table__
+            db.execute(
+                update(table)
+                .where(table.c.record_id == bindparam("b_record_id"))
+                .values(next_occurrence=bindparam("b_next_occurrence")),
+                [
+                    {"b_record_id": record_id, "b_next_occurrence": next_occurrence}
+                    for record_id, next_occurrence in zip(record_ids, next_occurrences)
+                ],
+            )
+            updated += len(rows)
+
+        db.commit()
+        return updated
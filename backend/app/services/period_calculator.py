@@ -1,8 +1,38 @@
-from datetime import datetime
+from calendar import monthrange
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Sequence
+import heapq
+import numpy as np
 from dateutil.relativedelta import relativedelta
 from app.models.base import PeriodType
 
 
+# 各周期对应的月数（周周期单独按天数处理）
+PERIOD_MONTHS = {
+    PeriodType.MONTH: 1,
+    PeriodType.QUARTER: 3,
+    PeriodType.HALF_YEAR: 6,
+    PeriodType.YEAR: 12,
+}
+
+WEEK = timedelta(weeks=1)
+
+# 每年发生次数，用于把单次金额折算为年化 / 月均金额
+PERIODS_PER_YEAR = {
+    PeriodType.WEEK: 52,
+    PeriodType.MONTH: 12,
+    PeriodType.QUARTER: 4,
+    PeriodType.HALF_YEAR: 2,
+    PeriodType.YEAR: 1,
+}
+
+# 批量计算用：周周期记为 0 个月
+_PERIOD_STEPS = {PeriodType.WEEK: 0, **PERIOD_MONTHS}
+_WEEK_US = np.timedelta64(1, "W").astype("timedelta64[us]")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
 def calculate_next_occurrence(
     base_date: datetime, period: PeriodType, start_date: datetime
 ) -> datetime:
@@ -25,14 +55,59 @@ def calculate_next_occurrence(
 def calculate_next_occurrences(
     start_date: datetime, period: PeriodType, count: int = 10
 ) -> list[datetime]:
-    occurrences = []
-    current = start_date
+    """
+    start_date 之后的 count 次发生时间
 
-    for _ in range(count):
-        current = calculate_next_occurrence(current, period, start_date)
-        occurrences.append(current)
+    与 calculate_next_occurrence_from_now 一样以 start_date 为锚点计算，
+    月末日期不会漂移（1-31 按月 → 2-29 → 3-31 → 4-30）。
+    """
+    return [occurrence_at(start_date, period, index) for index in range(1, count + 1)]
+
+
+def annualize(amount: float, period: PeriodType) -> float:
+    """按周期折算年化金额，如每周 2000 → 每年 104000"""
+    return amount * PERIODS_PER_YEAR[period]
 
-    return occurrences
+
+def occurrence_at(start_date: datetime, period: PeriodType, index: int) -> datetime:
+    """
+    计算第 index 次发生的时间（index=0 即 start_date）
+
+    始终以 start_date 为锚点一次跳到目标周期，月末日期按 relativedelta 的规则
+    截断（如 1-31 按月 → 2-28 → 3-31），不会因逐次累加而漂移。
+    """
+    if period == PeriodType.WEEK:
+        return start_date + WEEK * index
+    # 等价于 start_date + relativedelta(months=...)，直接换算年月以减少对象开销
+    year, month = divmod(
+        start_date.month - 1 + PERIOD_MONTHS[period] * index, 12
+    )
+    year += start_date.year
+    month += 1
+    day = min(start_date.day, monthrange(year, month)[1])
+    return start_date.replace(year=year, month=month, day=day)
+
+
+def periods_until(start_date: datetime, period: PeriodType, moment: datetime) -> int:
+    """
+    返回最小的 n >= 0，使得 occurrence_at(start_date, period, n) >= moment
+
+    按周期直接用日期差计算，耗时与 start_date 距今多久无关。
+    """
+    if start_date >= moment:
+        return 0
+
+    if period == PeriodType.WEEK:
+        weeks, remainder = divmod(moment - start_date, WEEK)
+        return weeks + (1 if remainder else 0)
+
+    step = PERIOD_MONTHS[period]
+    months = (moment.year - start_date.year) * 12 + moment.month - start_date.month
+    n = months // step
+    # 同一个月内可能仍早于 moment，此时顺延一个周期
+    if occurrence_at(start_date, period, n) < moment:
+        n += 1
+    return n
 
 
 def calculate_next_occurrence_from_now(
@@ -42,7 +117,7 @@ def calculate_next_occurrence_from_now(
     计算从当前时间开始的下一个周期时间
 
     如果 start_date >= now，直接返回 start_date
-    否则，从 start_date 开始，按照周期递增，找到第一个 >= now 的日期
+    否则，直接算出 start_date 到 now 之间经过的整周期数，跳到第一个 >= now 的日期
 
     例如：
     - start_date: 2024-11-01
@@ -53,9 +128,263 @@ def calculate_next_occurrence_from_now(
     if start_date >= now:
         return start_date
 
-    # 从 start_date 开始，按周期递增，找到第一个 >= now 的日期
-    current = start_date
-    while current < now:
-        current = calculate_next_occurrence(current, period, start_date)
+    return occurrence_at(start_date, period, periods_until(start_date, period, now))
+
+
+def iter_occurrences(
+    start_date: datetime,
+    period: PeriodType,
+    window_start: datetime,
+    window_end: datetime,
+    end_date: datetime | None = None,
+) -> Iterator[datetime]:
+    """
+    按时间顺序生成 [window_start, window_end) 内的每一次发生时间
+
+    包含 start_date 本身；end_date 为最后允许发生的时间（含）。
+    窗口内第一次发生的序号由 periods_until 直接算出，不会从 start_date 逐个推进。
+    """
+    if end_date is not None and end_date < window_end:
+        window_end = end_date + _MICROSECOND
+
+    index = periods_until(start_date, period, window_start)
+    while True:
+        occurrence = occurrence_at(start_date, period, index)
+        if occurrence >= window_end:
+            return
+        yield occurrence
+        index += 1
+
+
+def record_schedule(record) -> tuple[str, datetime, PeriodType, datetime | None]:
+    """提取记录的 (id, 开始时间, 周期, 结束时间)，用于发生时间展开"""
+    from app.models.record import SimpleRecord
+
+    if isinstance(record, SimpleRecord):
+        return record.id, record.time, record.period, None
+    return record.id, record.start_time, record.period, record.end_time
+
+
+def expand_occurrences(
+    records: Iterable,
+    window_start: datetime,
+    window_end: datetime,
+    ordered: bool = False,
+) -> Iterator[tuple[str, datetime]]:
+    """
+    展开一批记录在 [window_start, window_end) 内的全部发生时间，逐条生成 (record_id, 发生时间)
+
+    records 可以是 SimpleRecord / PaymentRecord，也可以是
+    (id, 开始时间, 周期, 结束时间) 元组（如只查询所需列的结果行）。
+    默认逐条记录依次展开；ordered=True 时按发生时间全局排序（惰性归并）。
+    """
+
+    def expand(record) -> Iterator[tuple[str, datetime]]:
+        record_id, start_date, period, end_date = (
+            tuple(record) if isinstance(record, tuple) else record_schedule(record)
+        )
+        for occurrence in iter_occurrences(
+            start_date, period, window_start, window_end, end_date
+        ):
+            yield record_id, occurrence
+
+    if not ordered:
+        for record in records:
+            yield from expand(record)
+        return
+
+    yield from heapq.merge(
+        *(expand(record) for record in records), key=lambda item: item[1]
+    )
+
+
+def _as_datetime64(values: Sequence[datetime] | np.ndarray) -> np.ndarray:
+    """转换为 datetime64[us] 数组；datetime 列表走整数微秒，避免逐个对象解析"""
+    if isinstance(values, np.ndarray):
+        return values.astype("datetime64[us]")
+    return np.fromiter(
+        ((value - _EPOCH) // _MICROSECOND for value in values),
+        dtype=np.int64,
+        count=len(values),
+    ).view("datetime64[us]")
+
+
+def _add_months_batch(starts: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """向量化的 start + relativedelta(months=n)，目标月天数不足时截断到月末"""
+    start_month = starts.astype("datetime64[M]")
+    start_day = starts.astype("datetime64[D]")
+    day_offset = start_day - start_month.astype("datetime64[D]")
+    time_of_day = starts - start_day
+
+    target_month = start_month + months.astype("timedelta64[M]")
+    first_day = target_month.astype("datetime64[D]")
+    last_offset = (target_month + 1).astype("datetime64[D]") - first_day - 1
+    return first_day + np.minimum(day_offset, last_offset) + time_of_day
+
+
+def period_steps(periods: Sequence[PeriodType | str]) -> np.ndarray:
+    """把周期编码转换为每周期月数数组（周周期为 0），供批量计算使用"""
+    # PeriodType 是 str 枚举，枚举成员与其字符串值可共用同一个字典键
+    return np.fromiter(
+        (_PERIOD_STEPS[p] for p in periods), dtype=np.int64, count=len(periods)
+    )
+
+
+def periods_until_batch(
+    starts: np.ndarray, steps: np.ndarray, moments: np.ndarray | np.datetime64
+) -> np.ndarray:
+    """
+    periods_until 的向量化版本：逐元素返回最小的 n >= 0，使第 n 次发生时间 >= moment
+
+    starts 为 datetime64[us] 数组，steps 来自 period_steps，
+    moments 可以是单个 datetime64 或与 starts 等长的数组。
+    """
+    moments = np.broadcast_to(np.asarray(moments, dtype="datetime64[us]"), starts.shape)
+    result = np.zeros(starts.shape, dtype=np.int64)
+    past = starts < moments
+
+    weekly = past & (steps == 0)
+    if weekly.any():
+        # 正数的向上取整：-(-a // b)
+        result[weekly] = -((starts[weekly] - moments[weekly]) // _WEEK_US)
+
+    monthly = past & (steps > 0)
+    if monthly.any():
+        s = starts[monthly]
+        m = moments[monthly]
+        step = steps[monthly]
+        months = (m.astype("datetime64[M]") - s.astype("datetime64[M]")).astype(
+            np.int64
+        )
+        n = months // step
+        # 同一个月内可能仍早于 moment，此时顺延一个周期
+        result[monthly] = n + (_add_months_batch(s, n * step) < m)
+
+    return result
+
+
+def occurrences_at_batch(
+    starts: np.ndarray, steps: np.ndarray, indices: np.ndarray
+) -> np.ndarray:
+    """occurrence_at 的向量化版本，返回 datetime64[us] 数组"""
+    result = starts.copy()
+
+    weekly = steps == 0
+    if weekly.any():
+        result[weekly] = starts[weekly] + indices[weekly] * _WEEK_US
+
+    monthly = ~weekly
+    if monthly.any():
+        result[monthly] = _add_months_batch(
+            starts[monthly], indices[monthly] * steps[monthly]
+        )
+
+    return result
+
+
+def calculate_next_occurrences_batch(
+    start_times: Sequence[datetime] | np.ndarray,
+    periods: Sequence[PeriodType | str],
+    now: datetime,
+) -> np.ndarray:
+    """
+    批量计算下一个周期时间，结果与逐条调用 calculate_next_occurrence_from_now 一致
+
+    start_times 与 periods 为等长的平行数组，返回 datetime64[us] 数组；
+    周周期按 timedelta64 整周计算，其余周期按 datetime64[M] 月份差计算。
+    """
+    starts = _as_datetime64(start_times)
+    steps = period_steps(periods)
+    indices = periods_until_batch(starts, steps, np.datetime64(now, "us"))
+    return occurrences_at_batch(starts, steps, indices)
+
+
+def count_occurrences_batch(
+    start_times: Sequence[datetime] | np.ndarray,
+    periods: Sequence[PeriodType | str],
+    end_times: Sequence[datetime | None],
+    boundaries: Sequence[datetime],
+) -> np.ndarray:
+    """
+    统计每条记录在相邻边界 [boundaries[k], boundaries[k+1]) 内的发生次数
+
+    返回形状为 (len(boundaries) - 1, 记录数) 的整数数组；end_times 为最后允许
+    发生的时间（含），None 表示不结束。次数由边界处的周期序号相减得到，不逐个展开。
+    """
+    starts = _as_datetime64(start_times)
+    steps = period_steps(periods)
+    indices = np.stack(
+        [
+            periods_until_batch(starts, steps, np.datetime64(boundary, "us"))
+            for boundary in boundaries
+        ]
+    )
+
+    return np.diff(_cap_at_end(indices, starts, steps, end_times), axis=0)
+
+
+def _cap_at_end(
+    indices: np.ndarray,
+    starts: np.ndarray,
+    steps: np.ndarray,
+    end_times: Sequence[datetime | None],
+) -> np.ndarray:
+    """把周期序号截断到结束时间之后的第一个序号（end_times 为最后允许发生的时间，含）"""
+    has_end = np.fromiter(
+        (end is not None for end in end_times), dtype=bool, count=len(starts)
+    )
+    if has_end.any():
+        ends = _as_datetime64([end for end in end_times if end is not None])
+        last = periods_until_batch(
+            starts[has_end], steps[has_end], ends + np.timedelta64(1, "us")
+        )
+        indices[..., has_end] = np.minimum(indices[..., has_end], last)
+    return indices
+
+
+def occurrences_in_window_batch(
+    start_times: Sequence[datetime] | np.ndarray,
+    periods: Sequence[PeriodType | str],
+    end_times: Sequence[datetime | None],
+    window_start: datetime,
+    window_end: datetime,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    向量化展开每条记录在 [window_start, window_end) 内的全部发生时间
+
+    返回等长的 (记录下标, datetime64[us] 发生时间) 两个数组。每条记录窗口内的
+    首个序号与次数由边界处的周期序号算出，再用 repeat / arange 一次生成全部序号。
+    """
+    starts = _as_datetime64(start_times)
+    steps = period_steps(periods)
+    first = periods_until_batch(starts, steps, np.datetime64(window_start, "us"))
+    last = _cap_at_end(
+        periods_until_batch(starts, steps, np.datetime64(window_end, "us")),
+        starts,
+        steps,
+        end_times,
+    )
+    counts = np.maximum(last - first, 0)
+
+    owners = np.repeat(np.arange(len(starts)), counts)
+    # 每次发生在本记录内的序号偏移：全局位置减去该记录第一段的起始位置
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    indices = first[owners] + np.arange(len(owners)) - offsets
+    return owners, occurrences_at_batch(starts[owners], steps[owners], indices)
+
+
+def attach_next_occurrences(records: Iterable, now: datetime) -> None:
+    """为一批 SimpleRecord / PaymentRecord 一次性计算并挂上 next_occurrence"""
+    from app.models.record import SimpleRecord, PaymentRecord
+
+    recurring = [r for r in records if isinstance(r, (SimpleRecord, PaymentRecord))]
+    if not recurring:
+        return
 
-    return current
+    next_occurrences = calculate_next_occurrences_batch(
+        [r.time if isinstance(r, SimpleRecord) else r.start_time for r in recurring],
+        [r.period for r in recurring],
+        now,
+    ).tolist()
+    for record, next_occurrence in zip(recurring, next_occurrences):
+        record.next_occurrence = next_occurrence
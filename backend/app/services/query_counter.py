@@ -0,0 +1,30 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """统计一次请求内执行的 SQL 语句数，用于发现 N+1 查询回归"""
+
+    def __init__(self):
+        self.count = 0
+
+
+_current_counter: ContextVar[QueryCounter | None] = ContextVar(
+    "query_counter", default=None
+)
+
+
+def start_counting() -> QueryCounter:
+    # 计数器对象按引用共享，线程池中执行的同步路由也会累加到同一个对象上
+    counter = QueryCounter()
+    _current_counter.set(counter)
+    return counter
+
+
+def install(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        counter = _current_counter.get()
+        if counter is not None:
+            counter.count += 1
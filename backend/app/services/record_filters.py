@@ -0,0 +1,126 @@
+from datetime import datetime
+from sqlalchemy import and_, false, or_, select
+from app.models.base import RecordType, PeriodType, Direction
+from app.models.record import (
+    BaseRecord,
+    SimpleRecord,
+    PaymentRecord,
+    record_categories,
+    record_payment_methods,
+)
+from app.models.support import Category, PaymentMethod
+
+_records = BaseRecord.__table__
+_simples = SimpleRecord.__table__
+_payments = PaymentRecord.__table__
+
+
+def in_range(column, start: datetime | None, end: datetime | None) -> list:
+    """生成 start <= column < end 的过滤条件，未给出的一端不限制"""
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return conditions
+
+
+def _linked_to(association, column_name: str, model, names: list[str], user_id: str):
+    """
+    记录关联了该用户任一给定名称的分类 / 付款方式：按 (user_id, name) 找到分类，
+    再走关联表 (xxx_id, record_id) 索引；其他用户的同名分类不会匹配
+    """
+    return _records.c.id.in_(
+        select(association.c.record_id)
+        .join(model, model.id == association.c[column_name])
+        .where(model.user_id == user_id, model.name.in_(names))
+    )
+
+
+def record_conditions(
+    record_type: RecordType | None = None,
+    direction: Direction | None = None,
+    period: PeriodType | None = None,
+    category: list[str] | None = None,
+    payment_method: list[str] | None = None,
+    min_amount: float | None = None,
+    max_amount: float | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency: str | None = None,
+    user_id: str = "default",
+) -> list:
+    """
+    把列表筛选条件编译为作用于 records / simple_records / payment_records 的 WHERE 条件
+
+    方向、分类、付款方式、金额、币种只存在于收付款记录上，给出任一项即限定为收付款记录；
+    period 与日期范围（简单提醒的 time / 收付款的 start_time，[start, end)）
+    在未限定类型时对两张子表分别判断。每个条件都落在子表列上，可走对应的组合索引。
+    分类 / 付款方式按名称匹配 user_id 所属的条目。
+    """
+    payment_only = any(
+        value is not None
+        for value in (
+            direction,
+            category,
+            payment_method,
+            min_amount,
+            max_amount,
+            currency,
+        )
+    )
+    if payment_only:
+        if record_type == RecordType.SIMPLE:
+            return [false()]
+        record_type = RecordType.PAYMENT
+
+    simple_conditions = []
+    payment_conditions = []
+    if period is not None:
+        simple_conditions.append(_simples.c.period == period)
+        payment_conditions.append(_payments.c.period == period)
+    simple_conditions += in_range(_simples.c.time, start, end)
+    payment_conditions += in_range(_payments.c.start_time, start, end)
+
+    if direction is not None:
+        payment_conditions.append(_payments.c.direction == direction)
+    if min_amount is not None:
+        payment_conditions.append(_payments.c.amount >= min_amount)
+    if max_amount is not None:
+        payment_conditions.append(_payments.c.amount <= max_amount)
+    if currency is not None:
+        payment_conditions.append(_payments.c.currency == currency)
+    if category:
+        payment_conditions.append(
+            _linked_to(
+                record_categories, "category_id", Category, category, user_id
+            )
+        )
+    if payment_method:
+        payment_conditions.append(
+            _linked_to(
+                record_payment_methods,
+                "payment_method_id",
+                PaymentMethod,
+                payment_method,
+                user_id,
+            )
+        )
+
+    # 限定类型时以子表主键非空代替 records.type 判断，LEFT JOIN 可被优化为内连接
+    if record_type == RecordType.SIMPLE:
+        return [_simples.c.record_id.is_not(None), *simple_conditions]
+    if record_type == RecordType.PAYMENT:
+        return [_payments.c.record_id.is_not(None), *payment_conditions]
+    if record_type is not None:
+        if simple_conditions:
+            return [false()]
+        return [_records.c.type == record_type]
+    if not simple_conditions:
+        return []
+    return [
+        or_(
+            and_(_simples.c.record_id.is_not(None), *simple_conditions),
+            and_(_payments.c.record_id.is_not(None), *payment_conditions),
+        )
+    ]
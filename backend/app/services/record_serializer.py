@@ -0,0 +1,273 @@
+from datetime import datetime
+from operator import attrgetter
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.base import RecordType
+from app.models.record import (
+    BaseRecord,
+    SimpleRecord,
+    PaymentRecord,
+    record_categories,
+    record_payment_methods,
+)
+from app.models.support import Category, PaymentMethod
+from app.services.period_calculator import calculate_next_occurrences_batch
+
+BASE_FIELDS = ("id", "type", "created_at", "updated_at")
+SIMPLE_FIELDS = BASE_FIELDS + (
+    "name",
+    "time",
+    "period",
+    "description",
+    "next_occurrence",
+)
+PAYMENT_FIELDS = BASE_FIELDS + (
+    "name",
+    "description",
+    "direction",
+    "amount",
+    "period",
+    "start_time",
+    "end_time",
+    "notes",
+    "currency",
+    "next_occurrence",
+)
+
+# attrgetter 一次取出所有列组成元组，再与字段名 zip 成 dict
+_GETTERS = (
+    (SimpleRecord, SIMPLE_FIELDS, attrgetter(*SIMPLE_FIELDS)),
+    (PaymentRecord, PAYMENT_FIELDS, attrgetter(*PAYMENT_FIELDS)),
+)
+_BASE_GETTER = attrgetter(*BASE_FIELDS)
+
+# 按 ID 批量查询关联名称时每条 IN 语句的参数个数上限
+_IN_CHUNK_SIZE = 500
+
+_records = BaseRecord.__table__
+_simples = SimpleRecord.__table__
+_payments = PaymentRecord.__table__
+
+# 列顺序：基础列、简单提醒列、收付款列，与下面的切片位置对应
+_SIMPLE_COLUMNS = [
+    _simples.c.name,
+    _simples.c.time,
+    _simples.c.period,
+    _simples.c.description,
+]
+_PAYMENT_COLUMNS = [
+    _payments.c.name,
+    _payments.c.description,
+    _payments.c.direction,
+    _payments.c.amount,
+    _payments.c.period,
+    _payments.c.start_time,
+    _payments.c.end_time,
+    _payments.c.notes,
+    _payments.c.currency,
+]
+_SIMPLE_SLICE = slice(4, 4 + len(_SIMPLE_COLUMNS))
+_PAYMENT_SLICE = slice(_SIMPLE_SLICE.stop, _SIMPLE_SLICE.stop + len(_PAYMENT_COLUMNS))
+
+RECORD_ROWS = select(
+    _records.c.id,
+    _records.c.type,
+    _records.c.created_at,
+    _records.c.updated_at,
+    *[column.label(f"simple_{column.name}") for column in _SIMPLE_COLUMNS],
+    *[column.label(f"payment_{column.name}") for column in _PAYMENT_COLUMNS],
+).select_from(
+    _records.outerjoin(_simples, _simples.c.record_id == _records.c.id).outerjoin(
+        _payments, _payments.c.record_id == _records.c.id
+    )
+)
+
+
+def serialize_record(record, empty_lists: bool = False) -> dict:
+    """
+    把 ORM 记录转换为响应 dict
+
+    datetime 与枚举保持原样，由 orjson 原生编码（ISO 8601 / 枚举值），
+    不再逐字段调用 isoformat() / .value。
+    收付款没有分类 / 支付方式时，查询接口返回 null，
+    创建 / 更新接口按原有约定返回 []（empty_lists=True）。
+    """
+    for model, fields, getter in _GETTERS:
+        if isinstance(record, model):
+            data = dict(zip(fields, getter(record)))
+            break
+    else:
+        return dict(zip(BASE_FIELDS, _BASE_GETTER(record)))
+
+    if model is PaymentRecord:
+        empty = [] if empty_lists else None
+        data["category"] = [c.name for c in record.categories] or empty
+        data["payment_method"] = [pm.name for pm in record.payment_methods] or empty
+    return data
+
+
+def _names_by_record(
+    db: Session, association, column_name: str, model, record_ids: list[str]
+) -> dict[str, list[str]]:
+    names = {}
+    for offset in range(0, len(record_ids), _IN_CHUNK_SIZE):
+        for record_id, name in db.execute(
+            select(association.c.record_id, model.name)
+            .join(model, model.id == association.c[column_name])
+            .where(
+                association.c.record_id.in_(
+                    record_ids[offset : offset + _IN_CHUNK_SIZE]
+                )
+            )
+        ):
+            names.setdefault(record_id, []).append(name)
+    return names
+
+
+def serialize_rows(db: Session, rows, now: datetime) -> list[dict]:
+    """
+    把 RECORD_ROWS 查出的行元组直接转换为响应 dict，不经过 ORM 实例化
+
+    next_occurrence 按 now 批量计算；分类与付款方式各用一条（分块的）IN 查询取回。
+    """
+    recurring = [
+        (row.simple_time, row.simple_period)
+        if row.type == RecordType.SIMPLE
+        else (row.payment_start_time, row.payment_period)
+        for row in rows
+        if row.type in (RecordType.SIMPLE, RecordType.PAYMENT)
+    ]
+    next_occurrences = iter(
+        calculate_next_occurrences_batch(*zip(*recurring), now).tolist()
+        if recurring
+        else ()
+    )
+
+    payment_ids = [row.id for row in rows if row.type == RecordType.PAYMENT]
+    categories = _names_by_record(
+        db, record_categories, "category_id", Category, payment_ids
+    )
+    payment_methods = _names_by_record(
+        db, record_payment_methods, "payment_method_id", PaymentMethod, payment_ids
+    )
+
+    result = []
+    for row in rows:
+        base = tuple(row[:4])
+        if row.type == RecordType.SIMPLE:
+            values = base + tuple(row[_SIMPLE_SLICE]) + (next(next_occurrences),)
+            data = dict(zip(SIMPLE_FIELDS, values))
+        elif row.type == RecordType.PAYMENT:
+            values = base + tuple(row[_PAYMENT_SLICE]) + (next(next_occurrences),)
+            data = dict(zip(PAYMENT_FIELDS, values))
+            data["category"] = categories.get(row.id)
+            data["payment_method"] = payment_methods.get(row.id)
+        else:
+            data = dict(zip(BASE_FIELDS, base))
+        result.append(data)
+    return result
+
+
+# fields= 稀疏字段集可选的列字段；两张子表共有的列取非空的一边
+PROJECTION_COLUMNS = {
+    "id": _records.c.id,
+    "type": _records.c.type,
+    "created_at": _records.c.created_at,
+    "updated_at": _records.c.updated_at,
+    "name": func.coalesce(_simples.c.name, _payments.c.name),
+    "description": func.coalesce(_simples.c.description, _payments.c.description),
+    "period": func.coalesce(_simples.c.period, _payments.c.period),
+    "date": func.coalesce(
+        _simples.c.time, _payments.c.start_time, _records.c.created_at
+    ),
+    "time": _simples.c.time,
+    "direction": _payments.c.direction,
+    "amount": _payments.c.amount,
+    "start_time": _payments.c.start_time,
+    "end_time": _payments.c.end_time,
+    "notes": _payments.c.notes,
+    "currency": _payments.c.currency,
+}
+# 需要额外计算或查询的字段
+COMPUTED_FIELDS = ("next_occurrence", "category", "payment_method")
+
+# 投影查询前部固定附带的列：游标、日期与发生时间计算所需
+_HIDDEN_COLUMNS = (
+    _records.c.id.label("_id"),
+    _records.c.type.label("_type"),
+    _records.c.created_at.label("_created_at"),
+    PROJECTION_COLUMNS["date"].label("_date"),
+    func.coalesce(_simples.c.time, _payments.c.start_time).label("_start"),
+    PROJECTION_COLUMNS["period"].label("_period"),
+    _payments.c.end_time.label("_end"),
+)
+
+
+def parse_fields(fields: str) -> list[str]:
+    """解析逗号分隔的字段列表，去重并保持顺序；含未知字段时抛出 ValueError"""
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",")))
+    names = [name for name in names if name]
+    unknown = [
+        name
+        for name in names
+        if name not in PROJECTION_COLUMNS and name not in COMPUTED_FIELDS
+    ]
+    if not names:
+        raise ValueError("fields must not be empty")
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def projection_select(fields: list[str]):
+    """
+    把字段列表编译为只含这些列的 select
+
+    不构造 ORM 对象，也不进入 identity map；结果行由 serialize_projection 转换。
+    """
+    return select(
+        *_HIDDEN_COLUMNS,
+        *[
+            PROJECTION_COLUMNS[name].label(name)
+            for name in fields
+            if name in PROJECTION_COLUMNS
+        ],
+    ).select_from(
+        _records.outerjoin(_simples, _simples.c.record_id == _records.c.id).outerjoin(
+            _payments, _payments.c.record_id == _records.c.id
+        )
+    )
+
+
+def serialize_projection(
+    db: Session, rows, fields: list[str], now: datetime
+) -> list[dict]:
+    """把 projection_select 查出的行转换为只含所请求字段的 dict"""
+    columns = [name for name in fields if name in PROJECTION_COLUMNS]
+    offset = len(_HIDDEN_COLUMNS)
+    result = [dict(zip(columns, row[offset:])) for row in rows]
+
+    if "next_occurrence" in fields:
+        recurring = [
+            (data, row._start, row._period)
+            for data, row in zip(result, rows)
+            if row._start is not None
+        ]
+        for data in result:
+            data["next_occurrence"] = None
+        if recurring:
+            targets, starts, periods = zip(*recurring)
+            next_occurrences = calculate_next_occurrences_batch(starts, periods, now)
+            for data, next_occurrence in zip(targets, next_occurrences.tolist()):
+                data["next_occurrence"] = next_occurrence
+
+    payment_ids = [row._id for row in rows if row._type == RecordType.PAYMENT]
+    for name, association, column_name, model in (
+        ("category", record_categories, "category_id", Category),
+        ("payment_method", record_payment_methods, "payment_method_id", PaymentMethod),
+    ):
+        if name in fields:
+            names = _names_by_record(db, association, column_name, model, payment_ids)
+            for data, row in zip(result, rows):
+                data[name] = names.get(row._id)
+    return result
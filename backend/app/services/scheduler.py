@@ -0,0 +1,92 @@
+import logging
+from datetime import datetime
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.occurrence_service import OccurrenceService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+scheduler = BackgroundScheduler(timezone="UTC")
+
+
+def roll_forward_next_occurrences() -> int:
+    db = SessionLocal()
+    try:
+        return OccurrenceService.roll_forward(db, datetime.utcnow())
+    finally:
+        db.close()
+
+
+def sync_calendars() -> None:
+    """
+    向所有启用的 CalDAV 账户增量推送，单个账户失败不影响其他账户；
+    最后清理所有账户都已处理过的删除记录
+    """
+    from app.models.support import CalendarSync
+    from app.services.caldav_sync import CALDAV_PROVIDERS, CalDAVSyncService
+
+    db = SessionLocal()
+    try:
+        # 按 id 逐个加载：前一个账户的提交会使已加载的对象过期
+        sync_ids = (
+            db.query(CalendarSync.id)
+            .filter(
+                CalendarSync.enabled.is_(True),
+                CalendarSync.provider.in_(CALDAV_PROVIDERS),
+            )
+            .all()
+        )
+        for (sync_id,) in sync_ids:
+            try:
+                sync = db.get(CalendarSync, sync_id)
+                if sync is None:
+                    continue
+                result = CalDAVSyncService.push(db, sync)
+            except Exception:
+                db.rollback()
+                logger.exception("Calendar sync %s failed", sync_id)
+                continue
+            if result["failed"]:
+                logger.warning(
+                    "Calendar sync %s: %d operations failed, first errors: %s",
+                    sync_id,
+                    result["failed"],
+                    result["errors"][:3],
+                )
+        CalDAVSyncService.prune_tombstones(db)
+    finally:
+        db.close()
+
+
+def start_scheduler() -> None:
+    if scheduler.running:
+        return
+
+    # 启动时立即执行一次，补齐旧数据中为空的 next_occurrence
+    scheduler.add_job(
+        roll_forward_next_occurrences,
+        "interval",
+        minutes=settings.next_occurrence_refresh_minutes,
+        id="roll_forward_next_occurrences",
+        next_run_time=datetime.utcnow(),
+        coalesce=True,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        sync_calendars,
+        "interval",
+        minutes=settings.calendar_sync_interval_minutes,
+        id="sync_calendars",
+        coalesce=True,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.start()
+
+
+def shutdown_scheduler() -> None:
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
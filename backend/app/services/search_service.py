@@ -0,0 +1,414 @@
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.models.record import BaseRecord, SimpleRecord, PaymentRecord
+
+# trigram 分词器按 3 个字符切分，不依赖空格分词，中文名称也能做子串匹配；
+# 不足 3 个字符的词无法命中 trigram 索引。中文常见的两字词（房租、工资）
+# 走 records_bigrams：每列相邻两个字符各作为一个词建立索引。
+# 其余短词（单字、含标点）改用 LIKE 条件。
+TRIGRAM_LENGTH = 3
+BIGRAM_LENGTH = 2
+
+# 两字索引只覆盖每列前这么多个字符；record_search_positions 保存 1..该值，
+# 触发器用它在 SQL 中切出相邻两字（触发器中不能使用 WITH RECURSIVE），
+# 不依赖应用注册的函数，sqlite3 命令行等任意连接写入记录都能维护索引
+BIGRAM_MAX_POSITION = 10000
+
+
+def _bigrams(column: str) -> str:
+    """列中相邻两个字符以空格分隔的 SQL 表达式；含标点 / 空格的两字由分词器拆开"""
+    return (
+        f"(SELECT group_concat(substr({column}, n, {BIGRAM_LENGTH}), ' ') "
+        f"FROM record_search_positions WHERE n < length({column}))"
+    )
+
+# record_search 保存两张子表的可搜索文本，INTEGER PRIMARY KEY 保证 rowid 稳定
+# （VACUUM 不会改变），records_fts 以它为 external content 表。
+# 子表写入时由触发器同步到 record_search，再同步到 FTS 索引。
+# 虚拟表放在第一条：不支持 trigram / FTS5 时不会留下其余对象。
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+        name, description, notes,
+        content='record_search', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    # 两字索引保存自己的文本，删除时按 rowid 删除；只按词过滤、不需要位置信息
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS records_bigrams USING fts5(
+        name, description, notes,
+        tokenize='unicode61 remove_diacritics 0', detail=none
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS record_search_positions (n INTEGER PRIMARY KEY)",
+    f"""
+    INSERT OR IGNORE INTO record_search_positions (n)
+    WITH RECURSIVE positions (n) AS (
+        SELECT 1 UNION ALL SELECT n + 1 FROM positions WHERE n < {BIGRAM_MAX_POSITION}
+    )
+    SELECT n FROM positions
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS record_search (
+        id INTEGER PRIMARY KEY,
+        record_id VARCHAR NOT NULL UNIQUE,
+        name VARCHAR,
+        description VARCHAR,
+        notes VARCHAR
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_ai AFTER INSERT ON record_search
+    BEGIN
+        INSERT INTO records_fts (rowid, name, description, notes)
+        VALUES (new.id, new.name, new.description, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_ad AFTER DELETE ON record_search
+    BEGIN
+        INSERT INTO records_fts (records_fts, rowid, name, description, notes)
+        VALUES ('delete', old.id, old.name, old.description, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_au AFTER UPDATE ON record_search
+    BEGIN
+        INSERT INTO records_fts (records_fts, rowid, name, description, notes)
+        VALUES ('delete', old.id, old.name, old.description, old.notes);
+        INSERT INTO records_fts (rowid, name, description, notes)
+        VALUES (new.id, new.name, new.description, new.notes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_ai
+    AFTER INSERT ON record_search
+    BEGIN
+        INSERT INTO records_bigrams (rowid, name, description, notes)
+        VALUES (
+            new.id,
+            {_bigrams("new.name")},
+            {_bigrams("new.description")},
+            {_bigrams("new.notes")}
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_ad
+    AFTER DELETE ON record_search
+    BEGIN
+        DELETE FROM records_bigrams WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS record_search_bigrams_au
+    AFTER UPDATE ON record_search
+    BEGIN
+        DELETE FROM records_bigrams WHERE rowid = old.id;
+        INSERT INTO records_bigrams (rowid, name, description, notes)
+        VALUES (
+            new.id,
+            {_bigrams("new.name")},
+            {_bigrams("new.description")},
+            {_bigrams("new.notes")}
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS simple_records_search_ai
+    AFTER INSERT ON simple_records
+    BEGIN
+        INSERT INTO record_search (record_id, name, description)
+        VALUES (new.record_id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS simple_records_search_au
+    AFTER UPDATE OF name, description ON simple_records
+    BEGIN
+        UPDATE record_search SET name = new.name, description = new.description
+        WHERE record_id = new.record_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS simple_records_search_ad
+    AFTER DELETE ON simple_records
+    BEGIN
+        DELETE FROM record_search WHERE record_id = old.record_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS payment_records_search_ai
+    AFTER INSERT ON payment_records
+    BEGIN
+        INSERT INTO record_search (record_id, name, description, notes)
+        VALUES (new.record_id, new.name, new.description, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS payment_records_search_au
+    AFTER UPDATE OF name, description, notes ON payment_records
+    BEGIN
+        UPDATE record_search
+        SET name = new.name, description = new.description, notes = new.notes
+        WHERE record_id = new.record_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS payment_records_search_ad
+    AFTER DELETE ON payment_records
+    BEGIN
+        DELETE FROM record_search WHERE record_id = old.record_id;
+    END
+    """,
+]
+
+# 已有数据补录到 record_search（触发器随之写入 FTS 索引）
+FTS_BACKFILL = [
+    """
+    INSERT INTO record_search (record_id, name, description)
+    SELECT record_id, name, description FROM simple_records
+    WHERE record_id NOT IN (SELECT record_id FROM record_search)
+    """,
+    """
+    INSERT INTO record_search (record_id, name, description, notes)
+    SELECT record_id, name, description, notes FROM payment_records
+    WHERE record_id NOT IN (SELECT record_id FROM record_search)
+    """,
+]
+
+# 两字索引晚于 record_search 加入：新建时从 record_search 补录
+BIGRAM_BACKFILL = f"""
+    INSERT INTO records_bigrams (rowid, name, description, notes)
+    SELECT
+        id,
+        {_bigrams("record_search.name")},
+        {_bigrams("record_search.description")},
+        {_bigrams("record_search.notes")}
+    FROM record_search
+"""
+
+# 上一版两字索引由应用注册的函数在触发器中生成（contentless 表），
+# 没有 record_search_positions；启动时删除后按当前结构重建
+BIGRAM_DROP = [
+    "DROP TRIGGER IF EXISTS record_search_bigrams_au",
+    "DROP TRIGGER IF EXISTS record_search_bigrams_ad",
+    "DROP TRIGGER IF EXISTS record_search_bigrams_ai",
+    "DROP TABLE IF EXISTS records_bigrams",
+]
+
+FTS_DROP = [
+    "DROP TRIGGER IF EXISTS payment_records_search_ad",
+    "DROP TRIGGER IF EXISTS payment_records_search_au",
+    "DROP TRIGGER IF EXISTS payment_records_search_ai",
+    "DROP TRIGGER IF EXISTS simple_records_search_ad",
+    "DROP TRIGGER IF EXISTS simple_records_search_au",
+    "DROP TRIGGER IF EXISTS simple_records_search_ai",
+    "DROP TRIGGER IF EXISTS record_search_au",
+    "DROP TRIGGER IF EXISTS record_search_ad",
+    "DROP TRIGGER IF EXISTS record_search_ai",
+    *BIGRAM_DROP,
+    "DROP TABLE IF EXISTS record_search_positions",
+    "DROP TABLE IF EXISTS records_fts",
+    "DROP TABLE IF EXISTS record_search",
+]
+
+# bm25 列权重：名称命中优先于描述，描述优先于备注
+BM25_WEIGHTS = (10.0, 3.0, 1.0)
+
+
+def install(connection: Connection) -> bool:
+    """
+    在 SQLite 上创建 FTS5 索引表与同步触发器（幂等），首次创建时补录已有记录；
+    由调用方提交事务
+
+    非 SQLite 数据库或 SQLite 未编译 FTS5 时返回 False，搜索改用 LIKE。
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+
+    existing = set(
+        connection.execute(
+            text(
+                "SELECT name FROM sqlite_master WHERE name IN "
+                "('record_search', 'records_bigrams', 'record_search_positions')"
+            )
+        ).scalars()
+    )
+    try:
+        connection.execute(text(FTS_DDL[0]))
+    except OperationalError:
+        # trigram 分词器需要 SQLite 3.34+ 且启用 FTS5
+        return False
+
+    if "records_bigrams" in existing and "record_search_positions" not in existing:
+        for statement in BIGRAM_DROP:
+            connection.execute(text(statement))
+        existing.discard("records_bigrams")
+    for statement in FTS_DDL[1:]:
+        connection.execute(text(statement))
+    if "record_search" not in existing:
+        for statement in FTS_BACKFILL:
+            connection.execute(text(statement))
+    elif "records_bigrams" not in existing:
+        connection.execute(text(BIGRAM_BACKFILL))
+    return True
+
+
+def _fts_ready(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    return (
+        db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'records_bigrams'")
+        ).first()
+        is not None
+    )
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _like_any(columns, term: str):
+    pattern = _like_pattern(term)
+    return or_(*[column.ilike(pattern, escape="\\") for column in columns])
+
+
+class SearchService:
+    """按名称 / 描述 / 备注全文搜索记录，返回按相关度排序的记录 ID"""
+
+    @staticmethod
+    def search_ids(db: Session, q: str, limit: int, offset: int = 0) -> list[str]:
+        """
+        空格分隔的多个词之间为 AND 关系
+
+        SQLite 上三字以上的词走 FTS5 trigram 索引并按 bm25 排序，两字词走
+        records_bigrams 索引（只有两字词时按写入顺序倒序）；单字或含标点的短词
+        用 LIKE 过滤，只有这类词时按 LIKE 扫描 record_search。不支持 FTS5 的数据库
+        按 LIKE / ILIKE 匹配子表列并按创建时间倒序（PostgreSQL 可配合 pg_trgm 索引）。
+        """
+        terms = list(dict.fromkeys(q.split()))
+        if not terms:
+            return []
+
+        if _fts_ready(db):
+            return SearchService._search_fts(db, terms, limit, offset)
+        return SearchService._search_like(db, terms, limit, offset)
+
+    @staticmethod
+    def _search_fts(db: Session, terms: list[str], limit: int, offset: int) -> list[str]:
+        params = {"limit": limit, "offset": offset}
+        long_terms = [term for term in terms if len(term) >= TRIGRAM_LENGTH]
+        pair_terms = [
+            term for term in terms if len(term) == BIGRAM_LENGTH and term.isalnum()
+        ]
+        short_terms = [
+            term for term in terms if term not in long_terms and term not in pair_terms
+        ]
+
+        # 有三字以上的词时按 trigram 索引排序，否则按两字索引排序；
+        # 两者都没有（只有单字 / 含标点的短词）时无法使用索引，扫描 record_search
+        if long_terms:
+            table = "records_fts"
+        elif pair_terms:
+            table = "records_bigrams"
+        else:
+            table = None
+
+        conditions = []
+        if long_terms:
+            # 每个词作为短语（引号需转义），避免被解析为 FTS 查询语法
+            params["match"] = " AND ".join(
+                '"' + term.replace('"', '""') + '"' for term in long_terms
+            )
+            conditions.append("records_fts MATCH :match")
+        if pair_terms:
+            # 两字词只含字母 / 数字，不需要转义
+            params["pairs"] = " AND ".join(
+                f'"{term.lower()}"' for term in pair_terms
+            )
+            if table == "records_bigrams":
+                conditions.append("records_bigrams MATCH :pairs")
+            else:
+                # 一元 + 阻止把 rowid IN 下推给 FTS 逐个查找：先取出两字索引的命中，
+                # 再过滤 trigram 的命中
+                conditions.append(
+                    "+records_fts.rowid IN (SELECT rowid FROM records_bigrams "
+                    "WHERE records_bigrams MATCH :pairs)"
+                )
+        for i, term in enumerate(short_terms):
+            params[f"like_{i}"] = _like_pattern(term)
+            conditions.append(
+                "("
+                + " OR ".join(
+                    f"record_search.{column} LIKE :like_{i} ESCAPE '\\'"
+                    for column in ("name", "description", "notes")
+                )
+                + ")"
+            )
+
+        if table is None:
+            statement = (
+                f"SELECT record_id FROM record_search WHERE {' AND '.join(conditions)} "
+                "ORDER BY id DESC LIMIT :limit OFFSET :offset"
+            )
+            return list(db.execute(text(statement), params).scalars())
+
+        # 先在 FTS 表内取出一页 rowid，再回表取 record_id，
+        # 避免对全部命中行做连接后再排序；LIKE 条件按主键逐行回表判断
+        if short_terms:
+            like = " AND ".join(conditions[-len(short_terms) :])
+            conditions = conditions[: -len(short_terms)] + [
+                "EXISTS (SELECT 1 FROM record_search "
+                f"WHERE record_search.id = {table}.rowid AND {like})"
+            ]
+        if table == "records_fts":
+            weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+            score, order = f"bm25(records_fts, {weights})", "score"
+        else:
+            # 只有两字词时与短词的 LIKE 扫描一样按写入顺序倒序：常见的两字词
+            # 命中很多，按 rowid 倒序取到一页即可停止，不必为全部命中计算 bm25
+            score, order = "-rowid", "rowid DESC"
+        statement = (
+            "SELECT record_search.record_id FROM ("
+            f"SELECT rowid, {score} AS score "
+            f"FROM {table} WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {order} LIMIT :limit OFFSET :offset"
+            ") AS hits JOIN record_search ON record_search.id = hits.rowid "
+            "ORDER BY hits.score"
+        )
+        return list(db.execute(text(statement), params).scalars())
+
+    @staticmethod
+    def _search_like(db: Session, terms: list[str], limit: int, offset: int) -> list[str]:
+        simples = SimpleRecord.__table__.c
+        payments = PaymentRecord.__table__.c
+        records = BaseRecord.__table__
+        columns = (
+            simples.name,
+            simples.description,
+            payments.name,
+            payments.description,
+            payments.notes,
+        )
+        return list(
+            db.execute(
+                select(records.c.id)
+                .select_from(
+                    records.outerjoin(
+                        SimpleRecord.__table__, simples.record_id == records.c.id
+                    ).outerjoin(
+                        PaymentRecord.__table__, payments.record_id == records.c.id
+                    )
+                )
+                .where(*[_like_any(columns, term) for term in terms])
+                .order_by(records.c.created_at.desc(), records.c.id.desc())
+                .limit(limit)
+                .offset(offset)
+            ).scalars()
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import threading
+from typing import Any, Callable, Hashable
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy.orm import Session
+
+# 等待者最多等待执行者的秒数，超时后自行执行，执行者卡住时不会一直占着线程
+WAIT_SECONDS = 30
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def finish(self, result: Any = None, error: BaseException | None = None) -> None:
+        with self._lock:
+            if self.done.is_set():
+                return
+            self.result, self.error = result, error
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    async def wait_async(self, timeout: float | None = None) -> bool:
+        """在事件循环中等待结束，不占用线程池线程；超时返回 False"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            if self.done.is_set():
+                return True
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            return self.done.is_set()
+
+
+class SingleFlight:
+    """
+    进程内的请求合并：相同 key 的并发调用只执行一次，其余调用等待并共享结果
+
+    只合并同时在进行的调用，不缓存结果：执行结束后下一次调用会重新执行。
+    执行抛出的异常同样传给所有等待者；等待超时的调用自行执行。
+    """
+
+    _lock = threading.Lock()
+    _calls: dict[Hashable, _Call] = {}
+
+    @classmethod
+    def acquire(cls, key: Hashable) -> tuple[_Call, bool]:
+        """登记一次调用；返回 (调用, 是否由本次调用执行)"""
+        with cls._lock:
+            call = cls._calls.get(key)
+            if call is not None:
+                return call, False
+            call = cls._calls[key] = _Call()
+            return call, True
+
+    @classmethod
+    def release(
+        cls,
+        key: Hashable,
+        call: _Call,
+        result: Any = None,
+        error: BaseException | None = None,
+    ) -> None:
+        """结束调用并唤醒等待者；重复调用无副作用"""
+        with cls._lock:
+            if cls._calls.get(key) is call:
+                del cls._calls[key]
+        call.finish(result, error)
+
+    @classmethod
+    def do(
+        cls, key: Hashable, fn: Callable[[], Any], timeout: float = WAIT_SECONDS
+    ) -> Any:
+        call, leader = cls.acquire(key)
+        if not leader:
+            if not call.done.wait(timeout):
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            result = fn()
+        except BaseException as error:
+            cls.release(key, call, error=error)
+            raise
+        cls.release(key, call, result=result)
+        return result
+
+
+def _render(result: Any) -> Response:
+    if isinstance(result, Response):
+        return result
+    return ORJSONResponse(jsonable_encoder(result))
+
+
+def single_flight(name: str):
+    """
+    合并对同步只读接口的并发相同请求
+
+    以接口名和除数据库会话外的全部参数为 key；执行者在自己的会话仍打开时
+    把结果编码为响应体，等待者各自用同一份字节与响应头构造响应，不共享 ORM 对象。
+    被装饰的接口必须是同步函数（def），在线程池中执行。
+    """
+
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(**kwargs):
+            key = (
+                name,
+                *sorted(
+                    (param, value)
+                    for param, value in kwargs.items()
+                    if not isinstance(value, Session)
+                ),
+            )
+            response = SingleFlight.do(key, lambda: _render(endpoint(**kwargs)))
+            # 保留接口设置的响应头；Content-Length 由新响应按内容重新计算
+            headers = {
+                header: value
+                for header, value in response.headers.items()
+                if header != "content-length"
+            }
+            return Response(
+                content=response.body,
+                status_code=response.status_code,
+                headers=headers,
+                media_type=response.media_type,
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from app.models.record import SimpleRecord, PaymentRecord
+from app.models.base import Direction
+from app.services.record_filters import in_range
+from app.services.period_calculator import (
+    count_occurrences_batch,
+    occurrences_in_window_batch,
+)
+
+
+class StatsService:
+    """在数据库端完成计数与求和，只返回标量结果"""
+
+    @staticmethod
+    def payment_totals(
+        db: Session, start: datetime | None = None, end: datetime | None = None
+    ) -> dict:
+        """按 direction 分组统计 [start, end) 内收付款记录的条数与金额"""
+        rows = db.execute(
+            select(
+                PaymentRecord.direction,
+                func.count(PaymentRecord.record_id),
+                func.coalesce(func.sum(PaymentRecord.amount), 0.0),
+            )
+            .where(*in_range(PaymentRecord.start_time, start, end))
+            .group_by(PaymentRecord.direction)
+        ).all()
+
+        totals = {
+            "count": 0,
+            "income": 0.0,
+            "expense": 0.0,
+        }
+        for direction, count, amount in rows:
+            totals["count"] += count
+            if direction == Direction.INCOME:
+                totals["income"] += float(amount)
+            elif direction == Direction.EXPENSE:
+                totals["expense"] += float(amount)
+        return totals
+
+    @staticmethod
+    def simple_count(
+        db: Session, start: datetime | None = None, end: datetime | None = None
+    ) -> int:
+        """统计 [start, end) 内的简单提醒条数"""
+        return db.execute(
+            select(func.count(SimpleRecord.record_id)).where(
+                *in_range(SimpleRecord.time, start, end)
+            )
+        ).scalar_one()
+
+    @staticmethod
+    def forecast(db: Session, months: int, now: datetime) -> list[dict]:
+        """
+        预测从本月起 months 个自然月的收入、支出与结余
+
+        按每条收付款记录的周期在 start_time 与 end_time 之间展开，
+        每月的发生次数由 count_occurrences_batch 直接算出。
+        """
+        boundaries = []
+        for offset in range(months + 1):
+            year, month = divmod(now.month - 1 + offset, 12)
+            boundaries.append(datetime(now.year + year, month + 1, 1))
+
+        # 只取计算所需的列，走 Core 查询跳过 ORM 行处理
+        payments = PaymentRecord.__table__.c
+        rows = db.execute(
+            select(
+                payments.start_time,
+                payments.end_time,
+                payments.period,
+                payments.direction,
+                payments.amount,
+            ).where(
+                payments.start_time < boundaries[-1],
+                or_(payments.end_time.is_(None), payments.end_time >= boundaries[0]),
+            )
+        ).all()
+
+        income = np.zeros(months)
+        expense = np.zeros(months)
+        if rows:
+            starts, ends, periods, directions, amounts = zip(*rows)
+            counts = count_occurrences_batch(starts, periods, ends, boundaries)
+            amounts = np.asarray(amounts, dtype=float)
+            is_income = np.fromiter(
+                (d == Direction.INCOME for d in directions),
+                dtype=bool,
+                count=len(rows),
+            )
+            income = counts[:, is_income] @ amounts[is_income]
+            expense = counts[:, ~is_income] @ amounts[~is_income]
+
+        return [
+            {
+                "month": boundaries[i].strftime("%Y-%m"),
+                "income": float(income[i]),
+                "expense": float(expense[i]),
+                "balance": float(income[i] - expense[i]),
+            }
+            for i in range(months)
+        ]
+
+    @staticmethod
+    def daily_summary(db: Session, start: datetime, end: datetime) -> list[dict]:
+        """
+        按天汇总 [start, end) 内的发生次数与收入、支出（含周期重复），只返回有发生的日期
+
+        候选记录用 time / start_time / end_time 的索引范围条件取出，
+        全部发生时间一次向量化展开后用 bincount 按天累加，不逐日循环。
+        """
+        simples = SimpleRecord.__table__.c
+        payments = PaymentRecord.__table__.c
+        simple_rows = db.execute(
+            select(simples.time, simples.period).where(simples.time < end)
+        ).all()
+        payment_rows = db.execute(
+            select(
+                payments.start_time,
+                payments.period,
+                payments.end_time,
+                payments.direction,
+                payments.amount,
+            ).where(
+                payments.start_time < end,
+                or_(payments.end_time.is_(None), payments.end_time >= start),
+            )
+        ).all()
+        if not simple_rows and not payment_rows:
+            return []
+
+        # 简单提醒排在前面，金额记为 0、既不算收入也不算支出
+        starts = [row[0] for row in simple_rows] + [row[0] for row in payment_rows]
+        periods = [row[1] for row in simple_rows] + [row[1] for row in payment_rows]
+        ends = [None] * len(simple_rows) + [row[2] for row in payment_rows]
+        amounts = np.zeros(len(starts))
+        is_income = np.zeros(len(starts), dtype=bool)
+        is_expense = np.zeros(len(starts), dtype=bool)
+        if payment_rows:
+            _, _, _, directions, payment_amounts = zip(*payment_rows)
+            amounts[len(simple_rows) :] = payment_amounts
+            is_income[len(simple_rows) :] = [d == Direction.INCOME for d in directions]
+            is_expense[len(simple_rows) :] = [
+                d == Direction.EXPENSE for d in directions
+            ]
+
+        owners, occurrences = occurrences_in_window_batch(
+            starts, periods, ends, start, end
+        )
+        days = (occurrences - np.datetime64(start, "us")) // np.timedelta64(1, "D")
+        n_days = -(-(end - start) // timedelta(days=1))
+        counts = np.bincount(days, minlength=n_days)
+        income = np.bincount(
+            days, weights=np.where(is_income, amounts, 0.0)[owners], minlength=n_days
+        )
+        expense = np.bincount(
+            days, weights=np.where(is_expense, amounts, 0.0)[owners], minlength=n_days
+        )
+
+        return [
+            {
+                "date": (start + timedelta(days=int(day))).date().isoformat(),
+                "count": int(counts[day]),
+                "income": float(income[day]),
+                "expense": float(expense[day]),
+            }
+            for day in counts.nonzero()[0]
+        ]
@@ -0,0 +1,102 @@
+import secrets
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.record import PaymentRecord
+from app.models.support import SubscriptionToken
+from app.schemas.support import SubscriptionFilters
+from app.services.record_filters import record_conditions
+
+_payments = PaymentRecord.__table__
+
+
+class SubscriptionService:
+    """iCal 订阅令牌的签发、查找，以及把令牌编译为订阅内容的查询条件"""
+
+    @staticmethod
+    def create(
+        db: Session, user_id: str, filters: SubscriptionFilters | None = None
+    ) -> SubscriptionToken:
+        expiry = timedelta(hours=get_settings().subscription_token_expiry_hours)
+        filters_json = (
+            filters.model_dump_json(exclude_none=True) if filters is not None else None
+        )
+        subscription = SubscriptionToken(
+            token=secrets.token_urlsafe(24),
+            user_id=user_id,
+            filters=None if filters_json in (None, "{}") else filters_json,
+            expires_at=datetime.utcnow() + expiry,
+        )
+        db.add(subscription)
+        db.commit()
+        db.refresh(subscription)
+        return subscription
+
+    @staticmethod
+    def default_token(db: Session, user_id: str) -> SubscriptionToken:
+        """返回该用户未过期的不带筛选的令牌，没有时签发一个"""
+        subscription = (
+            db.query(SubscriptionToken)
+            .filter(
+                SubscriptionToken.user_id == user_id,
+                SubscriptionToken.filters.is_(None),
+                SubscriptionToken.expires_at > datetime.utcnow(),
+            )
+            .order_by(SubscriptionToken.expires_at.desc())
+            .first()
+        )
+        if subscription is not None:
+            return subscription
+        return SubscriptionService.create(db, user_id)
+
+    @staticmethod
+    def resolve(db: Session, token: str) -> SubscriptionToken | None:
+        """
+        按令牌（唯一索引）查找未过期的订阅，并顺延有效期
+
+        日历客户端会定期拉取订阅，剩余有效期不足一半时从现在起重新计算，
+        仍在使用的订阅链接不会过期；长期无人拉取的令牌照常失效。
+        每个有效期内最多写一次库。
+        """
+        now = datetime.utcnow()
+        subscription = (
+            db.query(SubscriptionToken)
+            .filter(
+                SubscriptionToken.token == token,
+                SubscriptionToken.expires_at > now,
+            )
+            .first()
+        )
+        if subscription is None:
+            return None
+
+        expiry = timedelta(hours=get_settings().subscription_token_expiry_hours)
+        if subscription.expires_at - now < expiry / 2:
+            subscription.expires_at = now + expiry
+            db.commit()
+        return subscription
+
+    @staticmethod
+    def filters(subscription: SubscriptionToken) -> SubscriptionFilters:
+        if not subscription.filters:
+            return SubscriptionFilters()
+        return SubscriptionFilters.model_validate_json(subscription.filters)
+
+    @staticmethod
+    def conditions(subscription: SubscriptionToken) -> list:
+        """
+        订阅内容的 WHERE 条件（作用于 RECORD_ROWS 的连接）
+
+        收付款记录限定为令牌所属用户；简单提醒没有 user_id 列，不按用户区分，
+        所有用户的订阅都包含全部简单提醒（未按 type 筛选时）。
+        """
+        filters = SubscriptionService.filters(subscription).model_dump()
+        filters["record_type"] = filters.pop("type")
+        return [
+            or_(
+                _payments.c.record_id.is_(None),
+                _payments.c.user_id == subscription.user_id,
+            ),
+            *record_conditions(user_id=subscription.user_id, **filters),
+        ]
@@ -0,0 +1,103 @@
+import threading
+from sqlalchemy import select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.models.support import Category, PaymentMethod
+
+
+class SupportNameCache:
+    """
+    进程内按用户缓存分类 / 付款方式的 name → id 映射
+
+    首次访问时一次性读取该用户的整张小表；/support 的增删改以及新建名称时
+    调用 invalidate 使对应用户的缓存失效，下次访问重新加载。
+    """
+
+    _lock = threading.Lock()
+    _names: dict[tuple[str, str], dict[str, str]] = {}
+
+    @classmethod
+    def names(
+        cls, db: Session, model: type[Category] | type[PaymentMethod], user_id: str
+    ) -> dict[str, str]:
+        key = (model.__tablename__, user_id)
+        with cls._lock:
+            cached = cls._names.get(key)
+        if cached is not None:
+            return cached
+
+        cached = {}
+        for item_id, name in db.execute(
+            select(model.id, model.name).where(model.user_id == user_id)
+        ):
+            cached.setdefault(name, item_id)
+
+        with cls._lock:
+            cls._names[key] = cached
+        return cached
+
+    @classmethod
+    def invalidate(
+        cls, model: type[Category] | type[PaymentMethod], user_id: str
+    ) -> None:
+        with cls._lock:
+            cls._names.pop((model.__tablename__, user_id), None)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._names.clear()
+
+    @classmethod
+    def resolve(
+        cls,
+        db: Session,
+        model: type[Category] | type[PaymentMethod],
+        user_id: str,
+        names: list[str] | None,
+    ) -> list[Category] | list[PaymentMethod]:
+        """
+        把一组名称解析为对象，不存在的名称批量创建
+
+        已缓存的名称不查库；未命中的名称用一条 IN 查询确认（可能由其他进程创建），
+        仍不存在的一次性插入。重复名称只保留一个。
+        """
+        wanted = list(dict.fromkeys(names or []))
+        if not wanted:
+            return []
+
+        known = cls.names(db, model, user_id)
+        ids = {name: known[name] for name in wanted if name in known}
+        created = {}
+
+        missing = [name for name in wanted if name not in ids]
+        if missing:
+            for item_id, name in db.execute(
+                select(model.id, model.name).where(
+                    model.user_id == user_id, model.name.in_(missing)
+                )
+            ):
+                ids.setdefault(name, item_id)
+
+            created = {
+                name: model(name=name, user_id=user_id)
+                for name in missing
+                if name not in ids
+            }
+            if created:
+                db.add_all(created.values())
+                db.flush()
+            cls.invalidate(model, user_id)
+
+        return [
+            created[name]
+            if name in created
+            else cls._attach(db, model, ids[name], name, user_id)
+            for name in wanted
+        ]
+
+    @staticmethod
+    def _attach(db: Session, model, item_id: str, name: str, user_id: str):
+        # 用缓存中的主键直接构造持久化对象，不再发起 SELECT
+        item = model(id=item_id, name=name, user_id=user_id)
+        make_transient_to_detached(item)
+        return db.merge(item, load=False)
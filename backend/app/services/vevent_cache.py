@@ -0,0 +1,46 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from app.config import get_settings
+
+
+class VEventCache:
+    """
+    进程内按记录缓存序列化好的 VEVENT 字节，LRU 淘汰
+
+    每条记录只保留最新一份 (updated_at, 字节)，updated_at 与数据库一致才算命中；
+    记录变化后旧片段被新片段原地替换，不会堆积。条目数上限由
+    ICAL_FRAGMENT_CACHE_SIZE 配置，超出时淘汰最久未使用的记录。
+    """
+
+    _lock = threading.Lock()
+    _fragments: "OrderedDict[str, tuple[datetime | None, bytes]]" = OrderedDict()
+
+    @classmethod
+    def get_many(
+        cls, keys: list[tuple[str, datetime | None]]
+    ) -> dict[str, bytes]:
+        """按 (record_id, updated_at) 批量查找，返回命中的 record_id → 片段"""
+        hits = {}
+        with cls._lock:
+            for record_id, updated_at in keys:
+                cached = cls._fragments.get(record_id)
+                if cached is not None and cached[0] == updated_at:
+                    cls._fragments.move_to_end(record_id)
+                    hits[record_id] = cached[1]
+        return hits
+
+    @classmethod
+    def put_many(cls, fragments: list[tuple[str, datetime | None, bytes]]) -> None:
+        max_size = get_settings().ical_fragment_cache_size
+        with cls._lock:
+            for record_id, updated_at, fragment in fragments:
+                cls._fragments[record_id] = (updated_at, fragment)
+                cls._fragments.move_to_end(record_id)
+            while len(cls._fragments) > max_size:
+                cls._fragments.popitem(last=False)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._fragments.clear()
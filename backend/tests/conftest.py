@@ -0,0 +1,86 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# 必须在导入 app 之前设置：app.main 导入时即按 DATABASE_URL 建表
+_tmpdir = tempfile.mkdtemp(prefix="supcal-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database import engine
+from app.main import app
+from app.models.base import Base
+from app.services.query_counter import QueryCounter
+
+API = "/api/v1"
+
+
+def _clear_caches() -> None:
+    from app.services.feed_cache import FeedCache
+    from app.services.support_cache import SupportNameCache
+    from app.services.vevent_cache import VEventCache
+
+    FeedCache.invalidate()
+    SupportNameCache.clear()
+    VEventCache.clear()
+
+
+@pytest.fixture
+def client():
+    # 不进入 TestClient 的上下文，避免启动定时任务
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    _clear_caches()
+    yield TestClient(app)
+    _clear_caches()
+
+
+@pytest.fixture
+def count_queries():
+    """返回上下文管理器，统计其中执行的 SQL 语句数（含线程池中执行的同步路由）"""
+
+    @contextmanager
+    def counting():
+        counter = QueryCounter()
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            counter.count += 1
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+    return counting
+
+
+def create_payment(client, name: str, **overrides) -> dict:
+    payload = {
+        "name": name,
+        "direction": "expense",
+        "amount": 100,
+        "period": "month",
+        "start_time": "2026-01-31T09:00:00",
+        "category": ["rent", "home"],
+        "payment_method": ["card"],
+        **overrides,
+    }
+    response = client.post(f"{API}/records/payment", json=payload)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def create_simple(client, name: str, **overrides) -> dict:
+    payload = {
+        "name": name,
+        "time": "2026-01-01T08:00:00",
+        "period": "week",
+        **overrides,
+    }
+    response = client.post(f"{API}/records/simple", json=payload)
+    assert response.status_code == 200, response.text
+    return response.json()
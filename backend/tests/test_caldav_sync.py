@@ -0,0 +1,290 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from conftest import API, create_simple
+from app.database import SessionLocal
+from app.models.record import RecordTombstone
+from app.models.support import CalendarSync, CalendarSyncItem
+from app.services.caldav_sync import CalDAVSyncService
+
+
+class _CalDAVStandIn(BaseHTTPRequestHandler):
+    """进程内 CalDAV 替身：只实现推送用到的 PUT / DELETE 与 ETag 条件请求"""
+
+    protocol_version = "HTTP/1.1"
+    server: "_CalDAVServer"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, etag: str | None = None) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_PUT(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            server.requests.append(("PUT", self.path))
+            if server.failures > 0:
+                server.failures -= 1
+                return self._reply(503)
+            current = server.store.get(self.path)
+            if_match = self.headers.get("If-Match")
+            if (if_match and (current is None or current[0] != if_match)) or (
+                self.headers.get("If-None-Match") == "*" and current is not None
+            ):
+                server.requests.append(("412", self.path))
+                return self._reply(412)
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            server.store[self.path] = (etag, body)
+        self._reply(201 if current is None else 204, etag)
+
+    def do_DELETE(self) -> None:
+        server = self.server
+        with server.lock:
+            server.requests.append(("DELETE", self.path))
+            if self.path not in server.store:
+                return self._reply(404)
+            if_match = self.headers.get("If-Match")
+            if if_match and server.store[self.path][0] != if_match:
+                return self._reply(412)
+            del server.store[self.path]
+        self._reply(204)
+
+
+class _CalDAVServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _CalDAVStandIn)
+        self.lock = threading.Lock()
+        self.store: dict[str, tuple[str, bytes]] = {}
+        self.requests: list[tuple[str, str]] = []
+        # 接下来的 PUT 中返回 503 的个数
+        self.failures = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/cal/"
+
+    def count(self, method: str) -> int:
+        return sum(1 for request in self.requests if request[0] == method)
+
+
+@pytest.fixture
+def caldav_server():
+    server = _CalDAVServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def account(client, caldav_server):
+    response = client.post(
+        API + "/calendar/sync-accounts",
+        json={
+            "provider": "caldav",
+            "account_id": "me",
+            "calendar_url": caldav_server.url,
+            "username": "user",
+            "password": "s3cret-password",
+        },
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _sync(client, server: _CalDAVServer, account: dict) -> dict:
+    server.requests.clear()
+    response = client.post(API + f"/calendar/sync-accounts/{account['id']}/sync")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _rename(client, record_id: str, name: str) -> None:
+    response = client.put(
+        API + f"/records/simple/{record_id}",
+        json={"name": name, "time": "2026-01-01T08:00:00", "period": "week"},
+    )
+    assert response.status_code == 200, response.text
+
+
+def _load_sync(sync_id: str) -> CalendarSync:
+    db = SessionLocal()
+    try:
+        return db.get(CalendarSync, sync_id)
+    finally:
+        db.close()
+
+
+def test_rejects_non_caldav_provider(client, caldav_server):
+    response = client.post(
+        API + "/calendar/sync-accounts",
+        json={
+            "provider": "google",
+            "account_id": "x",
+            "calendar_url": caldav_server.url,
+        },
+    )
+    assert response.status_code == 400
+
+
+def test_credentials_are_encrypted(client, account):
+    sync = _load_sync(account["id"])
+    assert "s3cret-password" not in sync.auth_data
+    assert CalDAVSyncService.credentials(sync) == {
+        "username": "user",
+        "password": "s3cret-password",
+    }
+
+
+def test_incremental_push(client, caldav_server, account):
+    ids = [create_simple(client, f"s{i}")["id"] for i in range(30)]
+
+    result = _sync(client, caldav_server, account)
+    assert (result["uploaded"], result["failed"]) == (30, 0)
+    assert len(caldav_server.store) == 30
+
+    # 没有变化时不发请求
+    result = _sync(client, caldav_server, account)
+    assert (result["uploaded"], result["deleted"]) == (0, 0)
+    assert caldav_server.requests == []
+
+    _rename(client, ids[5], "changed")
+    result = _sync(client, caldav_server, account)
+    assert (result["uploaded"], caldav_server.count("PUT")) == (1, 1)
+    assert b"changed" in caldav_server.store[f"/cal/{ids[5]}.ics"][1]
+
+    # 删除由 record_tombstones 发现，只删除这一条
+    assert client.delete(API + f"/records/{ids[7]}").status_code == 200
+    result = _sync(client, caldav_server, account)
+    assert (result["deleted"], caldav_server.count("DELETE")) == (1, 1)
+    assert f"/cal/{ids[7]}.ics" not in caldav_server.store
+
+
+def test_remote_change_is_overwritten(client, caldav_server, account):
+    record_id = create_simple(client, "local")["id"]
+    _sync(client, caldav_server, account)
+
+    href = f"/cal/{record_id}.ics"
+    caldav_server.store[href] = ('"remote"', b"remote")
+    _rename(client, record_id, "local-changed")
+    result = _sync(client, caldav_server, account)
+    assert (result["uploaded"], caldav_server.count("412")) == (1, 1)
+    assert b"local-changed" in caldav_server.store[href][1]
+
+
+def test_server_errors_are_retried(client, caldav_server, account):
+    create_simple(client, "flaky")
+    caldav_server.failures = 2
+    result = _sync(client, caldav_server, account)
+    assert (result["uploaded"], result["failed"]) == (1, 0)
+    assert caldav_server.count("PUT") == 3
+
+
+def test_failures_keep_sync_position(client, caldav_server, account):
+    create_simple(client, "first")
+    _sync(client, caldav_server, account)
+    synced_at = _load_sync(account["id"]).last_sync_at
+
+    record_id = create_simple(client, "second")["id"]
+    caldav_server.failures = 100
+    result = _sync(client, caldav_server, account)
+    assert result["failed"] == 1 and result["errors"]
+    assert _load_sync(account["id"]).last_sync_at == synced_at
+
+    # 恢复后从原位置重试
+    caldav_server.failures = 0
+    result = _sync(client, caldav_server, account)
+    assert (result["uploaded"], result["failed"]) == (1, 0)
+    assert f"/cal/{record_id}.ics" in caldav_server.store
+
+
+def test_scheduler_pushes_and_prunes_tombstones(client, caldav_server, account):
+    from app.services.scheduler import sync_calendars
+
+    ids = [create_simple(client, f"s{i}")["id"] for i in range(3)]
+    assert client.delete(API + f"/records/{ids[0]}").status_code == 200
+
+    db = SessionLocal()
+    try:
+        # 把删除时间移出 SYNC_OVERLAP 窗口，同步完成后即可清理
+        db.query(RecordTombstone).update(
+            {RecordTombstone.deleted_at: datetime.utcnow() - timedelta(hours=1)}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    sync_calendars()
+    assert len(caldav_server.store) == 2
+    db = SessionLocal()
+    try:
+        assert db.query(RecordTombstone).count() == 0
+    finally:
+        db.close()
+
+    # 账户已推送过记录、但同步一直失败时保留删除记录
+    caldav_server.failures = 100
+    assert client.delete(API + f"/records/{ids[1]}").status_code == 200
+    db = SessionLocal()
+    try:
+        db.query(CalendarSync).update({CalendarSync.last_sync_at: None})
+        db.commit()
+        assert CalDAVSyncService.prune_tombstones(db) == 0
+        assert db.query(RecordTombstone).count() == 1
+    finally:
+        db.close()
+
+
+def test_delete_account_removes_items(client, caldav_server, account):
+    create_simple(client, "one")
+    _sync(client, caldav_server, account)
+
+    response = client.delete(API + f"/calendar/sync-accounts/{account['id']}")
+    assert response.status_code == 200
+    db = SessionLocal()
+    try:
+        assert db.query(CalendarSyncItem).count() == 0
+    finally:
+        db.close()
+
+
+def test_scheduler_syncs_every_account(client, caldav_server, account):
+    from app.services.scheduler import sync_calendars
+    from app.services.vevent_cache import VEventCache
+
+    ids = [create_simple(client, f"s{i}")["id"] for i in range(3)]
+    _sync(client, caldav_server, account)
+
+    # 第一个账户已是最新；片段缓存为空时后续账户需要重新渲染
+    VEventCache.clear()
+    for path in ("second", "third"):
+        response = client.post(
+            API + "/calendar/sync-accounts",
+            json={
+                "provider": "caldav",
+                "account_id": path,
+                "calendar_url": f"{caldav_server.url}{path}/",
+                "enabled": True,
+            },
+        )
+        assert response.status_code == 200, response.text
+
+    sync_calendars()
+    for path in ("", "second/", "third/"):
+        for record_id in ids:
+            assert f"/cal/{path}{record_id}.ics" in caldav_server.store
+    db = SessionLocal()
+    try:
+        pending = db.query(CalendarSync).filter(CalendarSync.last_sync_at.is_(None))
+        assert pending.count() == 0
+    finally:
+        db.close()
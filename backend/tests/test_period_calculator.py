@@ -0,0 +1,108 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from app.models.base import PeriodType
+from app.services.period_calculator import (
+    PERIOD_MONTHS,
+    calculate_next_occurrence,
+    calculate_next_occurrence_from_now,
+    calculate_next_occurrences,
+    calculate_next_occurrences_batch,
+)
+
+PERIODS = list(PeriodType)
+
+
+def _loop_next_occurrence(now, period, start_date):
+    """改为闭式计算之前的逐周期累加实现"""
+    if start_date >= now:
+        return start_date
+    current = start_date
+    while current < now:
+        current = calculate_next_occurrence(current, period, start_date)
+    return current
+
+
+def _anchored_next_occurrence(now, period, start_date):
+    """逐周期推进、但每次都从 start_date 加整数个周期（不累加截断误差）"""
+    index = 0
+    current = start_date
+    while current < now:
+        index += 1
+        if period == PeriodType.WEEK:
+            current = start_date + relativedelta(weeks=index)
+        else:
+            current = start_date + relativedelta(months=PERIOD_MONTHS[period] * index)
+    return current
+
+
+def _random_cases(count, seed=20261018):
+    rng = random.Random(seed)
+    base = datetime(2000, 1, 1)
+    for _ in range(count):
+        start = base + timedelta(
+            days=rng.randrange(0, 365 * 30), seconds=rng.randrange(0, 86400)
+        )
+        now = start + timedelta(
+            days=rng.randrange(-400, 365 * 20), seconds=rng.randrange(0, 86400)
+        )
+        yield start, rng.choice(PERIODS), now
+
+
+def test_closed_form_matches_anchored_loop():
+    for start, period, now in _random_cases(1500):
+        assert calculate_next_occurrence_from_now(
+            now, period, start
+        ) == _anchored_next_occurrence(now, period, start), (start, period, now)
+
+
+def test_closed_form_matches_old_loop_without_month_end():
+    # 每月 28 日及以前的日期在旧实现中不会被截断，两种实现应完全一致
+    for start, period, now in _random_cases(1500, seed=7):
+        start = start.replace(day=min(start.day, 28))
+        assert calculate_next_occurrence_from_now(
+            now, period, start
+        ) == _loop_next_occurrence(now, period, start), (start, period, now)
+
+
+def test_batch_matches_scalar():
+    cases = list(_random_cases(2000, seed=11))
+    now = datetime(2026, 10, 18, 12)
+    result = calculate_next_occurrences_batch(
+        [start for start, _, _ in cases], [period for _, period, _ in cases], now
+    ).tolist()
+    for (start, period, _), value in zip(cases, result):
+        assert value == calculate_next_occurrence_from_now(now, period, start)
+
+
+def test_next_occurrences_agree_with_from_now():
+    for start, period, _ in _random_cases(1000, seed=3):
+        occurrences = calculate_next_occurrences(start, period, 6)
+        previous = start
+        for occurrence in occurrences:
+            assert occurrence > previous
+            assert (
+                calculate_next_occurrence_from_now(
+                    previous + timedelta(microseconds=1), period, start
+                )
+                == occurrence
+            )
+            previous = occurrence
+
+
+def test_month_end_is_anchored_to_start_date():
+    start = datetime(2024, 1, 31, 9)
+    assert calculate_next_occurrences(start, PeriodType.MONTH, 3) == [
+        datetime(2024, 2, 29, 9),
+        datetime(2024, 3, 31, 9),
+        datetime(2024, 4, 30, 9),
+    ]
+    assert calculate_next_occurrence_from_now(
+        datetime(2024, 3, 5), PeriodType.MONTH, start
+    ) == datetime(2024, 3, 31, 9)
+    assert calculate_next_occurrences_batch(
+        np.array([start], dtype="datetime64[us]"),
+        [PeriodType.MONTH],
+        datetime(2024, 3, 5),
+    ).tolist() == [datetime(2024, 3, 31, 9)]
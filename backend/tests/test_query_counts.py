@@ -0,0 +1,46 @@
+import pytest
+from conftest import API, create_payment, create_simple
+
+
+def _seed(client, start: int, stop: int) -> None:
+    """创建编号 [start, stop) 的记录，收付款与简单提醒交替，分类 / 付款方式各不相同"""
+    for i in range(start, stop):
+        if i % 2:
+            create_simple(client, f"simple-{i}")
+        else:
+            create_payment(
+                client,
+                f"payment-{i}",
+                category=[f"category-{i}", "rent"],
+                payment_method=[f"method-{i}"],
+            )
+
+
+def _statements(client, count_queries, path: str) -> int:
+    # 先请求一次预热进程内缓存，只比较稳定状态下的语句数
+    assert client.get(path).status_code == 200
+    with count_queries() as counter:
+        response = client.get(path)
+    assert response.status_code == 200
+    return counter.count
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/records",
+        "/records?limit=100",
+        "/records?fields=id,name,category",
+        "/records/{id}",
+        "/profile/export",
+    ],
+)
+def test_statement_count_does_not_grow_with_records(client, count_queries, path):
+    record = create_payment(client, "payment-0")
+    url = API + path.format(id=record["id"])
+    single = _statements(client, count_queries, url)
+
+    _seed(client, 1, 50)
+    many = _statements(client, count_queries, url)
+
+    assert many == single, f"{path}: {single} statements for 1 record, {many} for 50"
@@ -0,0 +1,49 @@
+from conftest import API, create_payment, create_simple
+
+
+def _names(client, **params) -> list[str]:
+    response = client.get(API + "/records", params=params)
+    assert response.status_code == 200, response.text
+    return sorted(record["name"] for record in response.json())
+
+
+def _move_to_bob(record_id: str) -> None:
+    """把记录及其分类 / 付款方式换成 bob 名下的同名条目（接口只为 default 用户建记录）"""
+    from app.database import SessionLocal
+    from app.models.record import PaymentRecord
+    from app.models.support import Category, PaymentMethod
+
+    db = SessionLocal()
+    try:
+        record = db.get(PaymentRecord, record_id)
+        record.user_id = "bob"
+        record.categories = [
+            Category(name=item.name, user_id="bob") for item in record.categories
+        ]
+        record.payment_methods = [
+            PaymentMethod(name=item.name, user_id="bob")
+            for item in record.payment_methods
+        ]
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_name_filters_are_scoped_by_user(client):
+    create_payment(client, "mine", category=["rent"], payment_method=["cash"])
+    bobs = create_payment(client, "bobs", category=["rent"], payment_method=["cash"])
+    _move_to_bob(bobs["id"])
+
+    assert _names(client, category="rent") == ["mine"]
+    assert _names(client, category="rent", user_id="bob") == ["bobs"]
+    assert _names(client, payment_method="cash") == ["mine"]
+    assert _names(client, payment_method="cash", user_id="bob") == ["bobs"]
+
+
+def test_type_query_parameter(client):
+    create_payment(client, "payment")
+    create_simple(client, "simple")
+
+    assert _names(client, type="simple") == ["simple"]
+    assert _names(client, type="payment") == ["payment"]
+    assert _names(client, type="simple", direction="expense") == []
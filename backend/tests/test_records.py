@@ -0,0 +1,26 @@
+from conftest import API, create_payment
+
+
+def test_payment_write_responses_keep_empty_lists(client):
+    record = create_payment(client, "房租", category=[], payment_method=[])
+    assert record["category"] == []
+    assert record["payment_method"] == []
+
+    response = client.put(
+        API + f"/records/payment/{record['id']}",
+        json={
+            "name": "房租",
+            "direction": "expense",
+            "amount": 100,
+            "period": "month",
+            "start_time": "2026-01-31T09:00:00",
+        },
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["category"] == []
+    assert response.json()["payment_method"] == []
+
+    # 查询接口仍按原有约定返回 null
+    fetched = client.get(API + f"/records/{record['id']}").json()
+    assert fetched["category"] is None
+    assert fetched["payment_method"] is None
@@ -0,0 +1,59 @@
+from conftest import API, create_payment, create_simple
+
+
+def _search(client, q: str) -> list[str]:
+    response = client.get(API + "/records/search", params={"q": q})
+    assert response.status_code == 200, response.text
+    return sorted(record["name"] for record in response.json())
+
+
+def test_two_character_terms(client):
+    create_payment(client, "房租", notes="每月房租 支付宝自动扣款")
+    create_payment(client, "工资", direction="income")
+    create_simple(client, "信用卡还款提醒", description="招商银行 credit card")
+
+    assert _search(client, "房租") == ["房租"]
+    assert _search(client, "工资") == ["工资"]
+    assert _search(client, "还款") == ["信用卡还款提醒"]
+    assert _search(client, "CR") == ["信用卡还款提醒"]
+    # 两字词与三字词、单字混合时取交集
+    assert _search(client, "信用卡 还款") == ["信用卡还款提醒"]
+    assert _search(client, "支付宝 房租") == ["房租"]
+    assert _search(client, "房租 扣") == ["房租"]
+    assert _search(client, "房租 工资") == []
+
+
+def test_two_character_index_follows_writes(client):
+    record = create_simple(client, "车贷提醒")
+    assert _search(client, "车贷") == ["车贷提醒"]
+
+    response = client.put(
+        API + f"/records/simple/{record['id']}",
+        json={"name": "房贷提醒", "time": "2026-01-01T08:00:00", "period": "month"},
+    )
+    assert response.status_code == 200, response.text
+    assert _search(client, "车贷") == []
+    assert _search(client, "房贷") == ["房贷提醒"]
+
+    assert client.delete(API + f"/records/{record['id']}").status_code == 200
+    assert _search(client, "房贷") == []
+
+
+def test_index_triggers_work_on_plain_connections(client):
+    import sqlite3
+    from app.database import engine
+
+    record = create_simple(client, "车贷提醒")
+    # 不经应用的连接（如 sqlite3 命令行）也能写入记录
+    connection = sqlite3.connect(engine.url.database)
+    try:
+        connection.execute(
+            "UPDATE simple_records SET name = '房贷提醒' WHERE record_id = ?",
+            (record["id"],),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+    assert _search(client, "车贷") == []
+    assert _search(client, "房贷") == ["房贷提醒"]
@@ -0,0 +1,112 @@
+import threading
+import time
+from fastapi.responses import ORJSONResponse
+from app.services.single_flight import SingleFlight, single_flight
+
+
+def test_concurrent_calls_share_one_execution():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(SingleFlight.do("k", work)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(SingleFlight.do("k", work)))
+        for _ in range(5)
+    ]
+    for thread in followers:
+        thread.start()
+    # 等待者登记后才让执行者返回
+    time.sleep(0.2)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert results == ["result"] * 6
+    assert len(calls) == 1
+
+
+def test_wrapper_keeps_endpoint_headers():
+    @single_flight("test.headers")
+    def endpoint(value: int):
+        return ORJSONResponse(
+            {"value": value}, status_code=201, headers={"X-Next-Cursor": "abc"}
+        )
+
+    response = endpoint(value=1)
+    assert response.status_code == 201
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.headers.getlist("content-type") == ["application/json"]
+    assert response.headers["content-length"] == str(len(response.body))
+    assert response.body == b'{"value":1}'
+
+
+def test_follower_runs_itself_after_timeout():
+    started = threading.Event()
+    release = threading.Event()
+
+    def stuck():
+        started.set()
+        release.wait(5)
+        return "leader"
+
+    leader = threading.Thread(target=lambda: SingleFlight.do("stuck", stuck))
+    leader.start()
+    started.wait(5)
+    try:
+        assert SingleFlight.do("stuck", lambda: "own", timeout=0.1) == "own"
+    finally:
+        release.set()
+        leader.join(5)
+
+
+def test_feed_followers_do_not_hold_threadpool(client, monkeypatch):
+    import asyncio
+    import anyio
+    import httpx
+    from conftest import API, create_simple
+    from app.api import calendar
+    from app.main import app
+
+    for i in range(20):
+        create_simple(client, f"s{i}")
+    token = client.get(API + "/calendar/subscriptions/token").json()["token"]
+
+    renders = []
+    feed_chunks = calendar._feed_chunks
+
+    def slow_chunks(conditions):
+        renders.append(1)
+        # 执行者输出较慢，其余请求都在它结束前到达
+        time.sleep(0.5)
+        yield from feed_chunks(conditions)
+
+    monkeypatch.setattr(calendar, "_feed_chunks", slow_chunks)
+    monkeypatch.setattr(calendar, "FEED_WAIT_SECONDS", 10)
+
+    async def fetch_all(count: int):
+        # 请求数多于线程池线程数：等待者若占着线程，执行者的流式输出就无法推进
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 4
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as http:
+            return await asyncio.gather(
+                *(http.get(API + f"/calendar/feed/{token}") for _ in range(count))
+            )
+
+    started = time.monotonic()
+    responses = asyncio.run(fetch_all(16))
+    assert time.monotonic() - started < 5
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert len(renders) == 1
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from conftest import API, create_payment, create_simple
+from app.database import SessionLocal
+from app.models.support import SubscriptionToken
+
+
+def _set_expiry(token: str, expires_at: datetime) -> None:
+    db = SessionLocal()
+    try:
+        db.query(SubscriptionToken).filter(SubscriptionToken.token == token).update(
+            {SubscriptionToken.expires_at: expires_at}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _expiry(token: str) -> datetime:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(SubscriptionToken.expires_at)
+            .filter(SubscriptionToken.token == token)
+            .scalar()
+        )
+    finally:
+        db.close()
+
+
+def test_feed_use_extends_expiry(client):
+    token = client.get(API + "/calendar/subscriptions/token").json()["token"]
+    issued = _expiry(token)
+
+    # 剩余有效期超过一半时不写库
+    assert client.get(API + f"/calendar/feed/{token}").status_code == 200
+    assert _expiry(token) == issued
+
+    _set_expiry(token, datetime.utcnow() + timedelta(hours=1))
+    assert client.get(API + f"/calendar/feed/{token}").status_code == 200
+    assert _expiry(token) > datetime.utcnow() + timedelta(days=29)
+
+
+def test_expired_token_is_rejected(client):
+    token = client.get(API + "/calendar/subscriptions/token").json()["token"]
+    _set_expiry(token, datetime.utcnow() - timedelta(seconds=1))
+    assert client.get(API + f"/calendar/feed/{token}").status_code == 404
+
+    renewed = client.get(API + "/calendar/subscriptions/token").json()["token"]
+    assert renewed != token
+
+
+def test_feed_scope(client):
+    create_payment(client, "default-payment")
+    create_simple(client, "shared-simple")
+    bob = client.get(
+        API + "/calendar/subscriptions/token", params={"user_id": "bob"}
+    ).json()["token"]
+    payments_only = client.post(
+        API + "/calendar/subscriptions", json={"user_id": "bob", "type": "payment"}
+    ).json()["token"]
+
+    # 简单提醒没有所属用户，出现在每个用户的订阅中；收付款只属于 default
+    feed = client.get(API + f"/calendar/feed/{bob}").text
+    assert "shared-simple" in feed and "default-payment" not in feed
+    feed = client.get(API + f"/calendar/feed/{payments_only}").text
+    assert "shared-simple" not in feed
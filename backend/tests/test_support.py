@@ -0,0 +1,34 @@
+from conftest import API
+
+
+def test_list_keeps_duplicate_names(client):
+    # 分类允许重名；付款方式新建时按名称去重，但改名后仍可能重名
+    categories = {
+        client.post(API + "/support/categories", json={"name": "dup"}).json()["id"]
+        for _ in range(2)
+    }
+    methods = {
+        client.post(API + "/support/payment-methods", json={"name": name}).json()["id"]
+        for name in ("dup", "other")
+    }
+    other = next(
+        item["id"]
+        for item in client.get(API + "/support/payment-methods").json()
+        if item["name"] == "other"
+    )
+    client.put(API + f"/support/payment-methods/{other}", json={"name": "dup"})
+
+    for path, ids in (
+        ("/support/categories", categories),
+        ("/support/payment-methods", methods),
+    ):
+        listed = client.get(API + path).json()
+        assert {item["id"] for item in listed} == ids
+        assert [item["name"] for item in listed] == ["dup", "dup"]
+
+
+def test_list_is_scoped_by_user(client):
+    client.post(API + "/support/categories", json={"name": "rent"})
+    client.post(API + "/support/categories", json={"name": "rent", "user_id": "bob"})
+    listed = client.get(API + "/support/categories", params={"user_id": "bob"}).json()
+    assert [(item["user_id"], item["name"]) for item in listed] == [("bob", "rent")]